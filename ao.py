@@ -9,29 +9,142 @@
 #  License:     MIT License
 # ----------------------------------------------------------------------------
 
-from PIL import Image, ImageEnhance
+import math
+import numpy as np
+from PIL import Image
+import pyramid
 
-def generate_ao_map(diffuse_image: Image.Image, ao_intensity: float) -> Image.Image:
+def sample_levels(radius: int, scales: int) -> list:
     """
-    Genera un mapa de oclusión ambiental donde todo es blanco (puede ajustarse) en formato RGB.
+    Elige los niveles de la pirámide que se muestrean para un radio dado.
 
-    Este mapa se utiliza para simular sombras de oclusión ambiental, que indican qué tan expuesta
-    está una superficie a la iluminación ambiente. Por defecto, genera una imagen completamente
-    blanca que puede ser ajustada en intensidad.
+    El nivel n de la pirámide promedia bloques de 2^n píxeles, así que el nivel más
+    alto se elige para cubrir el radio y los demás se reparten entre 1 y ese nivel.
 
     Args:
-        diffuse_image (PIL.Image.Image): La imagen diffuse de entrada (utilizada solo para obtener las dimensiones).
-        ao_intensity (float): La intensidad del brillo a aplicar al mapa de oclusión ambiental (0-100).
+        radius (int): El radio de muestreo en píxeles.
+        scales (int): La cantidad de escalas a muestrear.
 
     Returns:
-        PIL.Image.Image: El mapa de oclusión ambiental generado.
+        list: Los niveles de la pirámide a muestrear, sin repetidos y en orden creciente.
+    """
+    top_level = max(1, math.ceil(math.log2(max(2, radius))))
+    scales = max(1, min(scales, top_level))
+    if scales == 1:
+        return [top_level]
+    return sorted({round(1 + i * (top_level - 1) / (scales - 1)) for i in range(scales)})
+
+def occlusion_array(heights: np.ndarray, radius: int = 16, scales: int = 4, strength: float = 0.5) -> np.ndarray:
+    """
+    Calcula la oclusión ambiental de un arreglo de alturas (ver compute_occlusion).
+
+    Trabaja sobre los dos últimos ejes, así que también acepta una pila de texturas
+    del mismo tamaño (n x alto x ancho); cada una se procesa como si estuviera sola.
+
+    Args:
+        heights (numpy.ndarray): Las alturas (uint8), una imagen o una pila de imágenes.
+        radius (int): El radio de muestreo en píxeles. Defaults to 16.
+        scales (int): La cantidad de escalas de la pirámide que se combinan. Defaults to 4.
+        strength (float): La fuerza del oscurecimiento (0-1). Defaults to 0.5.
+
+    Returns:
+        numpy.ndarray: La oclusión (uint8), con la misma forma que heights.
+    """
+    levels = sample_levels(radius, scales)
+    pyramid_levels = []
+    level = heights
+    for _ in range(levels[-1]):
+        # Cada nivel se obtiene reduciendo el anterior, no la imagen original
+        level = pyramid.reduce(level)
+        pyramid_levels.append(level)
+    del level
+
+    # Mezcla de grueso a fino: la suma acumulada se amplía al doble y se le suma el
+    # nivel siguiente si se muestrea. Las escalas más finas pesan más que las amplias.
+    accumulated = None
+    for level in range(levels[-1], 0, -1):
+        current = pyramid_levels.pop()
+        if accumulated is not None:
+            accumulated = pyramid.upsample(accumulated, current.shape[-2:])
+        if level in levels:
+            if accumulated is None:
+                accumulated = current * (1.0 / level)
+            else:
+                accumulated += current * (1.0 / level)
+        elif accumulated is None:
+            accumulated = np.zeros_like(current)
+    total_weight = sum(1.0 / level for level in levels)
+
+    # Resolución completa por franjas: desenfoque mezclado, diferencia con la altura y codificación
+    height, width = heights.shape[-2:]
+    padded = pyramid.pad_edges(accumulated)
+    encoded = np.empty(heights.shape, dtype=np.uint8)
+    for top in range(0, height, pyramid.STRIP_ROWS):
+        bottom = min(height, top + pyramid.STRIP_ROWS)
+        occlusion = pyramid.upsample_strip(padded, top, bottom, width)
+        occlusion *= 1.0 / (255.0 * total_weight)
+        occlusion -= heights[..., top:bottom, :] * np.float32(1.0 / 255.0)
+        np.maximum(occlusion, 0.0, out=occlusion)
+        occlusion *= strength * 16.0
+        np.clip(occlusion, 0.0, 1.0, out=occlusion)
+        encoded[..., top:bottom, :] = (1.0 - occlusion) * 255
+    return encoded
+
+def compute_occlusion(height_map: Image.Image, radius: int = 16, scales: int = 4, strength: float = 0.5) -> Image.Image:
     """
-    width, height = diffuse_image.size
-    # Crear una imagen completamente blanca
-    ao_map = Image.new('RGB', (width, height), color=(255, 255, 255))
+    Calcula la oclusión ambiental a partir del mapa de altura, sin ajuste de intensidad.
 
-    # Ajustar intensidad usando brillo
-    enhancer = ImageEnhance.Brightness(ao_map)
-    ao_map = enhancer.enhance(ao_intensity * 0.01)  # Se multiplica el porcentaje por un valor para conseguir más brillo
+    Compara la altura de cada píxel con una mezcla de copias cada vez más desenfocadas
+    del mapa, obtenidas de una pirámide de reducción a la mitad. Donde el entorno
+    desenfocado está más alto que el píxel, el píxel queda en una cavidad y se oscurece.
+    Los niveles muestreados se mezclan de grueso a fino a la resolución de cada nivel
+    y la mezcla se amplía a resolución completa una sola vez, por franjas, así que el
+    costo es casi proporcional a la cantidad de píxeles y no depende del radio ni de
+    la cantidad de escalas.
 
-    return ao_map
+    Args:
+        height_map (PIL.Image.Image): El mapa de altura de entrada.
+        radius (int): El radio de muestreo en píxeles (tamaño de las cavidades más grandes). Defaults to 16.
+        scales (int): La cantidad de escalas de la pirámide que se combinan. Defaults to 4.
+        strength (float): La fuerza del oscurecimiento (0-1). Defaults to 0.5.
+
+    Returns:
+        PIL.Image.Image: La oclusión en escala de grises (modo L), blanco donde no hay oclusión.
+    """
+    heights = np.asarray(height_map.convert('L'))
+    return Image.fromarray(occlusion_array(heights, radius, scales, strength), 'L')
+
+def apply_ao_intensity(occlusion: Image.Image, ao_intensity: float) -> Image.Image:
+    """
+    Ajusta la intensidad de la oclusión interpolando entre blanco (sin oclusión) y la oclusión calculada.
+
+    Args:
+        occlusion (PIL.Image.Image): La oclusión generada por compute_occlusion.
+        ao_intensity (float): La intensidad de la oclusión (0-1): 0 da un mapa blanco y 1 la oclusión completa.
+
+    Returns:
+        PIL.Image.Image: El mapa de oclusión ambiental generado, en escala de grises (modo L).
+    """
+    white = Image.new('L', occlusion.size, color=255)
+    return Image.blend(white, occlusion, max(0.0, min(1.0, ao_intensity)))
+
+def generate_ao_map(height_map: Image.Image, ao_intensity: float, radius: int = 16, scales: int = 4,
+                    strength: float = 0.5) -> Image.Image:
+    """
+    Genera un mapa de oclusión ambiental en escala de grises (modo L) a partir del mapa de altura.
+
+    Este mapa se utiliza para simular sombras de oclusión ambiental, que indican qué tan expuesta
+    está una superficie a la iluminación ambiente. Las zonas más bajas que su entorno (cavidades,
+    grietas) se oscurecen; luego se ajusta la intensidad interpolando desde blanco.
+
+    Args:
+        height_map (PIL.Image.Image): El mapa de altura de entrada.
+        ao_intensity (float): La intensidad de la oclusión (0-1).
+        radius (int): El radio de muestreo en píxeles. Defaults to 16.
+        scales (int): La cantidad de escalas de la pirámide que se combinan. Defaults to 4.
+        strength (float): La fuerza del oscurecimiento (0-1). Defaults to 0.5.
+
+    Returns:
+        PIL.Image.Image: El mapa de oclusión ambiental generado.
+    """
+    return apply_ao_intensity(compute_occlusion(height_map, radius, scales, strength), ao_intensity)
@@ -0,0 +1,291 @@
+# ----------------------------------------------------------------------------
+#  File:        atlas.py
+#  Module:      Atlas
+#  Description: Módulo para procesar muchas texturas pequeñas agrupadas en un atlas.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import math
+import numpy as np
+from PIL import Image
+from typing import Dict, List, Optional, Sequence, Tuple
+import normal
+import metallic
+import smoothness
+import edge
+import ao
+import pipeline
+from stages import SOURCE
+
+# Margen mínimo alrededor de cada textura. Los filtros de bordes y normales leen un
+# píxel de distancia; las normales de varias escalas necesitan además un margen
+# que cubra su alcance (ver pyramid_padding).
+DEFAULT_PADDING = 4
+
+class AtlasLayout:
+    """
+    Distribución de texturas del mismo tamaño en una grilla con margen.
+
+    Cada celda contiene una textura rodeada por un margen que repite sus píxeles
+    de borde, de modo que los filtros de vecindad ven lo mismo que verían en los
+    bordes de la textura aislada y no mezclan texturas vecinas. El lado de las
+    celdas se redondea a un múltiplo de alignment, para que los bloques que
+    promedian las pirámides de reducción no abarquen dos celdas; el redondeo se
+    suma al margen derecho e inferior.
+    """
+    def __init__(self, count: int, tile_size: int, padding: int = DEFAULT_PADDING, alignment: int = 1):
+        """
+        Inicializa la distribución.
+
+        Args:
+            count (int): La cantidad de texturas.
+            tile_size (int): El lado de cada textura en píxeles.
+            padding (int): El margen mínimo alrededor de cada textura en píxeles. Defaults to DEFAULT_PADDING.
+            alignment (int): El lado de las celdas es múltiplo de este valor. Defaults to 1.
+        """
+        self.count = count
+        self.tile_size = tile_size
+        self.padding = padding
+        self.cell_size = math.ceil((tile_size + 2 * padding) / alignment) * alignment
+        self.columns = max(1, math.ceil(math.sqrt(count)))
+        self.rows = max(1, math.ceil(count / self.columns))
+        self.size = (self.columns * self.cell_size, self.rows * self.cell_size)
+
+    def box(self, index: int) -> Tuple[int, int, int, int]:
+        """
+        Devuelve el recuadro (sin margen) de una textura dentro del atlas.
+
+        Args:
+            index (int): La posición de la textura.
+
+        Returns:
+            tuple: (izquierda, arriba, derecha, abajo).
+        """
+        row, col = divmod(index, self.columns)
+        left = col * self.cell_size + self.padding
+        top = row * self.cell_size + self.padding
+        return (left, top, left + self.tile_size, top + self.tile_size)
+
+    def tiles(self, array: np.ndarray) -> np.ndarray:
+        """
+        Devuelve una vista (filas, columnas, lado, lado[, canales]) del interior de cada celda.
+
+        Args:
+            array (numpy.ndarray): Un arreglo con el tamaño del atlas.
+
+        Returns:
+            numpy.ndarray: La vista; escribir en ella modifica el atlas.
+        """
+        cells = array.reshape(self.rows, self.cell_size, self.columns, self.cell_size, *array.shape[2:])
+        interior = slice(self.padding, self.padding + self.tile_size)
+        return cells[:, interior, :, interior].swapaxes(1, 2)
+
+    def fill_padding(self, array: np.ndarray):
+        """
+        Rellena el margen de cada celda repitiendo los píxeles de borde de su textura.
+
+        Args:
+            array (numpy.ndarray): Un arreglo con el tamaño del atlas (se modifica en su lugar).
+        """
+        cells = array.reshape(self.rows, self.cell_size, self.columns, self.cell_size, *array.shape[2:])
+        first, last = self.padding, self.padding + self.tile_size - 1
+        cells[:, :, :, :first] = cells[:, :, :, first:first + 1]
+        cells[:, :, :, last + 1:] = cells[:, :, :, last:last + 1]
+        cells[:, :first] = cells[:, first:first + 1]
+        cells[:, last + 1:] = cells[:, last:last + 1]
+
+def pyramid_padding(values: Dict) -> Tuple[int, int]:
+    """
+    Calcula el margen y la alineación de las celdas que necesita la pirámide de normales.
+
+    El nivel más alto de la pirámide promedia bloques de 2 ** nivel píxeles y,
+    al ampliarlo de grueso a fino, cada píxel recibe valores de bloques vecinos.
+    Con celdas alineadas a ese bloque y un margen de dos bloques, ningún bloque
+    que llega a una textura contiene píxeles de otra celda. La oclusión ambiental
+    no necesita margen porque se calcula por textura (ver generate_atlas_maps).
+
+    Args:
+        values (dict): Los valores escalados de los parámetros (ver pipeline.scale_parameters).
+
+    Returns:
+        tuple: El margen y la alineación en píxeles.
+    """
+    block = 2 ** max(0, values['normal_levels'] - 1)
+    return max(DEFAULT_PADDING, 2 * block), block
+
+def pack_atlas(images: Sequence[Image.Image], layout: AtlasLayout) -> Image.Image:
+    """
+    Agrupa texturas RGB del mismo tamaño en un atlas con margen.
+
+    Args:
+        images (list): Las texturas, todas de layout.tile_size x layout.tile_size.
+        layout (AtlasLayout): La distribución del atlas.
+
+    Returns:
+        PIL.Image.Image: El atlas en formato RGB.
+    """
+    array = np.zeros((layout.size[1], layout.size[0], 3), dtype=np.uint8)
+    tiles = layout.tiles(array)
+    for index, image in enumerate(images):
+        row, col = divmod(index, layout.columns)
+        tiles[row, col] = np.asarray(image.convert('RGB'))
+    layout.fill_padding(array)
+    return Image.fromarray(array, 'RGB')
+
+def autocontrast_tiles(tiles: np.ndarray):
+    """
+    Aplica ImageOps.autocontrast a cada textura de un atlas en escala de grises.
+
+    Reproduce el cálculo de Pillow (sin recorte) con el mínimo y el máximo de cada
+    textura, en lugar de los del atlas completo.
+
+    Args:
+        tiles (numpy.ndarray): La vista devuelta por AtlasLayout.tiles (se modifica en su lugar).
+    """
+    low = tiles.min(axis=(-2, -1), keepdims=True).astype(np.float64)
+    high = tiles.max(axis=(-2, -1), keepdims=True).astype(np.float64)
+    flat = high <= low
+    scale = 255.0 / np.where(flat, 1.0, high - low)
+    offset = -low * scale
+    stretched = np.clip(np.trunc(tiles * scale + offset), 0, 255)
+    tiles[...] = np.where(flat, tiles, stretched)
+
+def contrast_tiles(tiles: np.ndarray, factor: float):
+    """
+    Aplica ImageEnhance.Contrast a cada textura de un atlas, con la media de cada una.
+
+    Args:
+        tiles (numpy.ndarray): La vista devuelta por AtlasLayout.tiles, en escala de grises
+            (filas, columnas, lado, lado) o RGB (con un eje final de 3 canales). Se modifica en su lugar.
+        factor (float): El factor de contraste.
+    """
+    if tiles.ndim == 5:
+        # Luminancia con la misma conversión que Image.convert('L')
+        rgb = tiles.astype(np.int64)
+        luminance = (rgb[..., 0] * 19595 + rgb[..., 1] * 38470 + rgb[..., 2] * 7471 + 0x8000) >> 16
+        mean = np.floor(luminance.mean(axis=(-2, -1)) + 0.5)[:, :, None, None, None]
+    else:
+        mean = np.floor(tiles.mean(axis=(-2, -1), dtype=np.float64) + 0.5)[:, :, None, None]
+
+    # Image.blend trabaja en precisión simple
+    mean = mean.astype(np.float32)
+    blended = mean + np.float32(factor) * (tiles.astype(np.float32) - mean)
+    tiles[...] = np.clip(np.trunc(blended), 0, 255)
+
+def copy_tile_borders(destination: np.ndarray, source: np.ndarray):
+    """
+    Copia el borde de un píxel de cada textura de un atlas a otro.
+
+    Los filtros 3x3 de Pillow dejan sin filtrar el borde de la imagen; al filtrar
+    el atlas completo, este paso reproduce ese comportamiento en cada textura.
+
+    Args:
+        destination (numpy.ndarray): La vista de AtlasLayout.tiles a modificar.
+        source (numpy.ndarray): La vista de AtlasLayout.tiles con los valores originales.
+    """
+    destination[:, :, 0] = source[:, :, 0]
+    destination[:, :, -1] = source[:, :, -1]
+    destination[:, :, :, 0] = source[:, :, :, 0]
+    destination[:, :, :, -1] = source[:, :, :, -1]
+
+def generate_atlas_maps(diffuse_images: Sequence[Image.Image], parameters: Optional[Dict[str, float]] = None,
+                        padding: Optional[int] = None,
+                        intermediates: Optional[List[Dict[str, Image.Image]]] = None) -> List[Dict[str, Image.Image]]:
+    """
+    Genera los mapas de muchas texturas pequeñas ejecutando los generadores una vez sobre un atlas.
+
+    Los pasos que solo miran píxeles vecinos (bordes, normales) o cada píxel por
+    separado (metálico, suavidad, brillo) se ejecutan sobre el atlas completo.
+    Los pasos que usan estadísticas de toda la imagen (autocontraste y contraste)
+    y el tratamiento de bordes de los filtros de Pillow se resuelven por textura
+    sobre el atlas, para que el resultado sea el mismo que al procesar cada
+    textura por separado. La oclusión ambiental se calcula sobre la pila de
+    texturas (ver ao.occlusion_array), con el mismo resultado que cada textura
+    sola. Las normales de varias escalas se calculan sobre el atlas con el margen
+    y la alineación de pyramid_padding, por lo que no mezclan texturas vecinas,
+    pero cerca de los bordes pueden diferir levemente de la textura procesada
+    sola. Los mapas registrados con pipeline.register_map se generan sobre el
+    atlas completo.
+
+    Args:
+        diffuse_images (list): Las imágenes diffuse, todas cuadradas y del mismo tamaño.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        padding (int, optional): El margen alrededor de cada textura en píxeles. Si es None, usa
+            el de pyramid_padding, con las celdas alineadas a los bloques de la pirámide de normales.
+            Defaults to None.
+        intermediates (list, optional): Si se indica, recibe un diccionario por textura con sus
+            resultados intermedios, como 'normal_base' (ver pipeline.generate_maps). Defaults to None.
+
+    Returns:
+        list: Los mapas de cada textura por nombre, en el orden de entrada.
+    """
+    if not diffuse_images:
+        return []
+    tile_size = diffuse_images[0].size[0]
+    for image in diffuse_images:
+        if image.size != (tile_size, tile_size):
+            raise ValueError(f"Todas las texturas del atlas deben medir {tile_size}x{tile_size}, no {image.size}.")
+
+    values = pipeline.scale_parameters(parameters)
+    alignment = 1
+    if padding is None:
+        padding, alignment = pyramid_padding(values)
+    layout = AtlasLayout(len(diffuse_images), tile_size, padding, alignment)
+    diffuse_atlas = pack_atlas(diffuse_images, layout)
+
+    gray_atlas = diffuse_atlas.convert('L')
+
+    # Altura: escala de grises sobre el atlas, autocontraste y contraste por textura
+    height_array = np.array(gray_atlas)
+    autocontrast_tiles(layout.tiles(height_array))
+    contrast_tiles(layout.tiles(height_array), values['height'] * 0.1)
+    layout.fill_padding(height_array)
+    height_atlas = Image.fromarray(height_array, 'L')
+
+    # Normal: gradientes sobre el atlas, contraste por textura
+    normal_array = np.array(normal.compute_normal_base(height_atlas, values['normal_kernel'], values['normal_levels']))
+    normal_base_atlas = Image.fromarray(normal_array, 'RGB') if intermediates is not None else None
+    contrast_tiles(layout.tiles(normal_array), values['normal'] * 0.1)
+    normal_atlas = Image.fromarray(normal_array, 'RGB')
+
+    atlases = {
+        'height': height_atlas,
+        'normal': normal_atlas,
+        'metallic': metallic.generate_metallic_map(diffuse_atlas, values['metallic']),
+        'smoothness': smoothness.generate_smoothness_map(diffuse_atlas, values['smoothness']),
+    }
+
+    # Bordes: filtro sobre el atlas, con el borde de cada textura sin filtrar como en Pillow
+    edge_array = np.array(edge.detect_edges(diffuse_atlas))
+    copy_tile_borders(layout.tiles(edge_array), layout.tiles(np.asarray(gray_atlas)))
+    atlases['edge'] = edge.apply_edge_intensity(Image.fromarray(edge_array, 'L'), atlases['smoothness'], values['edge'])
+
+    # AO: sobre la pila de texturas, para que la pirámide no mezcle texturas vecinas
+    height_tiles = layout.tiles(height_array)
+    occlusion = ao.occlusion_array(height_tiles.reshape(-1, tile_size, tile_size), values['ao_radius'],
+                                   values['ao_scales'], values['ao_strength'])
+    occlusion_array = np.empty_like(height_array)
+    layout.tiles(occlusion_array)[...] = occlusion.reshape(height_tiles.shape)
+    layout.fill_padding(occlusion_array)
+    atlases['ao'] = ao.apply_ao_intensity(Image.fromarray(occlusion_array, 'L'), values['ao'])
+
+    # Mapas registrados con pipeline.register_map: se generan sobre el atlas completo
+    for stage in pipeline.STAGES:
+        if stage.export and stage.name != 'diffuse' and stage.name not in atlases:
+            available = dict(atlases, diffuse=diffuse_atlas, **{SOURCE: diffuse_atlas})
+            atlases[stage.name] = stage.run([available[name] for name in stage.inputs], values)
+
+    results = []
+    for index, diffuse_image in enumerate(diffuse_images):
+        box = layout.box(index)
+        maps = {'diffuse': diffuse_image}
+        for name in pipeline.MAP_NAMES[1:]:
+            maps[name] = atlases[name].crop(box)
+        results.append(maps)
+        if intermediates is not None:
+            intermediates.append({'normal_base': normal_base_atlas.crop(box)})
+    return results
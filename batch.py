@@ -0,0 +1,466 @@
+# ----------------------------------------------------------------------------
+#  File:        batch.py
+#  Module:      Batch
+#  Description: Módulo para generar los mapas de varias imágenes desde la línea de comandos.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import argparse
+import os
+from PIL import Image
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import atlas
+import mipmap
+import pipeline
+import scratch
+import scheduler
+import streaming
+
+def output_dir_for(source_path: str, output_root: str) -> str:
+    """
+    Devuelve el directorio de salida de una imagen diffuse (un subdirectorio por imagen).
+
+    Args:
+        source_path (str): La ruta de la imagen diffuse.
+        output_root (str): El directorio de salida del lote.
+
+    Returns:
+        str: El directorio donde se guardan los mapas de esa imagen.
+    """
+    return os.path.join(output_root, os.path.splitext(os.path.basename(source_path))[0])
+
+def process_source(source_path: str, output_root: str, resolutions: Sequence[int], parameters: Optional[Dict[str, float]] = None,
+                   mipmaps: Optional[str] = None, composite: bool = False, light_intensity: float = 1.0,
+                   scratch_dir: Optional[str] = None, bit_depth: int = 8) -> List[str]:
+    """
+    Genera y guarda todos los mapas de una imagen diffuse.
+
+    Con una sola resolución los mapas se guardan directamente en el directorio de la
+    imagen. Con varias, se calculan una vez a la resolución más alta y cada
+    resolución se guarda en su propio subdirectorio (ver pipeline.generate_resolution_tiers).
+
+    Args:
+        source_path (str): La ruta de la imagen diffuse.
+        output_root (str): El directorio de salida del lote.
+        resolutions (list): Las resoluciones objetivo en píxeles.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        mipmaps (str, optional): Formato de las cadenas de mipmaps ('tiff' o 'directory'),
+            o None para no generarlas. Defaults to None.
+        composite (bool): Si también se guarda la imagen compuesta. Defaults to False.
+        light_intensity (float): La intensidad de la luz de la composición (0.0-1.0). Defaults to 1.0.
+        scratch_dir (str, optional): Si se indica, los mapas intermedios se guardan en archivos
+            mapeados en memoria dentro de este directorio (ver scratch.ScratchStore). Defaults to None.
+        bit_depth (int): Profundidad de los mapas en escala de grises (8 o 16). Defaults to 8.
+
+    Returns:
+        list: Las rutas de los archivos escritos.
+    """
+    diffuse_image = load_source(source_path, resolutions)
+    outputs, scratch_store, normal_bases = compute_source(source_path, diffuse_image, output_root, resolutions,
+                                                          parameters, scratch_dir)
+    del diffuse_image  # Con scratch, la copia en disco es la única que se sigue usando
+    return write_outputs(outputs, scratch_store, normal_bases, mipmaps, composite, light_intensity, bit_depth, parameters)
+
+def load_source(source_path: str, resolutions: Sequence[int]) -> Image.Image:
+    """
+    Decodifica una imagen diffuse y la redimensiona a la mayor resolución pedida (primer paso de process_source).
+
+    Args:
+        source_path (str): La ruta de la imagen diffuse.
+        resolutions (list): Las resoluciones objetivo en píxeles.
+
+    Returns:
+        PIL.Image.Image: La imagen diffuse redimensionada.
+    """
+    return pipeline.load_diffuse_image(source_path, max(resolutions))
+
+def compute_source(source_path: str, diffuse_image: Image.Image, output_root: str, resolutions: Sequence[int],
+                   parameters: Optional[Dict[str, float]] = None,
+                   scratch_dir: Optional[str] = None) -> Tuple[Dict[str, MutableMapping], Optional[scratch.ScratchStore],
+                                                               Dict[str, Image.Image]]:
+    """
+    Genera los mapas de una imagen ya cargada (segundo paso de process_source).
+
+    Args:
+        source_path (str): La ruta de la imagen diffuse (para elegir el directorio de salida).
+        diffuse_image (PIL.Image.Image): La imagen devuelta por load_source.
+        output_root (str): El directorio de salida del lote.
+        resolutions (list): Las resoluciones objetivo en píxeles.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        scratch_dir (str, optional): El directorio de los mapas intermedios, o None. Defaults to None.
+
+    Returns:
+        tuple: Los mapas por directorio de salida, el almacén scratch usado (o None),
+        que write_outputs elimina al terminar, y el campo de normales sin ajuste de
+        intensidad por directorio de salida, para los mipmaps del mapa normal.
+    """
+    scratch_store = scratch.ScratchStore(scratch_dir) if scratch_dir else None
+    try:
+        output_dir = output_dir_for(source_path, output_root)
+        if len(set(resolutions)) == 1:
+            intermediates = {}
+            maps = pipeline.generate_maps(diffuse_image, parameters, scratch_store, intermediates=intermediates)
+            return {output_dir: maps}, scratch_store, {output_dir: intermediates['normal_base']}
+        # La imagen ya tiene la resolución más alta, así que generate_resolution_tiers no vuelve a redimensionarla
+        intermediates = {}
+        tiers = pipeline.generate_resolution_tiers(diffuse_image, resolutions, parameters, scratch_store, intermediates)
+        tier_dirs = {resolution: os.path.join(output_dir, f"{resolution}px") for resolution in tiers}
+        return ({tier_dirs[resolution]: maps for resolution, maps in sorted(tiers.items())}, scratch_store,
+                {tier_dirs[resolution]: intermediates[resolution]['normal_base'] for resolution in tiers})
+    except Exception:
+        if scratch_store is not None:
+            scratch_store.cleanup()
+        raise
+
+def write_outputs(outputs: Dict[str, MutableMapping], scratch_store: Optional[scratch.ScratchStore] = None,
+                  normal_bases: Optional[Dict[str, Image.Image]] = None, mipmaps: Optional[str] = None,
+                  composite: bool = False, light_intensity: float = 1.0, bit_depth: int = 8,
+                  parameters: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Guarda los mapas generados, sus mipmaps y la composición (último paso de process_source).
+
+    Args:
+        outputs (dict): Los mapas por directorio de salida devueltos por compute_source.
+        scratch_store (scratch.ScratchStore, optional): El almacén a eliminar al terminar. Defaults to None.
+        normal_bases (dict, optional): El campo de normales por directorio de salida devuelto por
+            compute_source. Sin él, el mapa normal se reduce como los demás mapas. Defaults to None.
+        mipmaps (str, optional): Formato de las cadenas de mipmaps, o None. Defaults to None.
+        composite (bool): Si también se guarda la imagen compuesta. Defaults to False.
+        light_intensity (float): La intensidad de la luz de la composición (0.0-1.0). Defaults to 1.0.
+        bit_depth (int): Profundidad de los mapas en escala de grises (8 o 16). Defaults to 8.
+        parameters (dict, optional): Valores de los sliders (0-100) con que se generaron los mapas,
+            para aplicar la intensidad normal a cada nivel de los mipmaps. Defaults to None.
+
+    Returns:
+        list: Las rutas de los archivos escritos.
+    """
+    normal_bases = normal_bases or {}
+    normal_intensity = pipeline.scale_parameters(parameters)['normal']
+    try:
+        paths = []
+        for tier_dir, maps in outputs.items():
+            paths += pipeline.save_maps(maps, tier_dir, bit_depth=bit_depth)
+            if mipmaps:
+                # Las cadenas se construyen desde los mapas en memoria, sin volver a decodificar los PNG
+                paths += mipmap.export_mip_chains(maps, tier_dir, mipmaps, normal_base=normal_bases.get(tier_dir),
+                                                  normal_intensity=normal_intensity, bit_depth=bit_depth)
+            if composite:
+                paths.append(pipeline.save_composite(maps, tier_dir, light_intensity))
+        return paths
+    finally:
+        if scratch_store is not None:
+            scratch_store.cleanup()
+
+def process_atlas_group(source_paths: Sequence[str], output_root: str, resolution: int,
+                        parameters: Optional[Dict[str, float]] = None, mipmaps: Optional[str] = None,
+                        composite: bool = False, light_intensity: float = 1.0, bit_depth: int = 8,
+                        writers: int = 2) -> Dict[str, List[str]]:
+    """
+    Genera y guarda los mapas de un grupo de imágenes pequeñas procesándolas en un atlas.
+
+    Args:
+        source_paths (list): Las rutas de las imágenes diffuse del grupo.
+        output_root (str): El directorio de salida del lote.
+        resolution (int): La resolución objetivo en píxeles.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        mipmaps (str, optional): Formato de las cadenas de mipmaps, o None. Defaults to None.
+        composite (bool): Si también se guarda la imagen compuesta. Defaults to False.
+        light_intensity (float): La intensidad de la luz de la composición (0.0-1.0). Defaults to 1.0.
+        bit_depth (int): Profundidad de los mapas en escala de grises (8 o 16). Defaults to 8.
+        writers (int): La cantidad de hilos que guardan los mapas (ver write_atlas_outputs). Defaults to 2.
+
+    Returns:
+        dict: Las rutas de los archivos escritos por imagen.
+    """
+    diffuse_images = [pipeline.load_diffuse_image(source_path, resolution) for source_path in source_paths]
+    intermediates = [] if mipmaps else None
+    sliced_maps = atlas.generate_atlas_maps(diffuse_images, parameters, intermediates=intermediates)
+    del diffuse_images
+    return write_atlas_outputs(source_paths, sliced_maps, output_root, mipmaps, composite, light_intensity,
+                               bit_depth, writers, intermediates, parameters)
+
+def write_atlas_outputs(source_paths: Sequence[str], sliced_maps: Sequence[Dict[str, Image.Image]], output_root: str,
+                        mipmaps: Optional[str] = None, composite: bool = False, light_intensity: float = 1.0,
+                        bit_depth: int = 8, writers: int = 2,
+                        intermediates: Optional[Sequence[Dict[str, Image.Image]]] = None,
+                        parameters: Optional[Dict[str, float]] = None) -> Dict[str, List[str]]:
+    """
+    Guarda los mapas recortados de un atlas, repartiendo las texturas entre varios hilos.
+
+    Con texturas pequeñas, guardar los PNG lleva más tiempo que generar el atlas.
+    Pillow libera el GIL mientras codifica, así que con varios núcleos las texturas
+    se codifican en paralelo.
+
+    Args:
+        source_paths (list): Las rutas de las imágenes diffuse del grupo.
+        sliced_maps (list): Los mapas de cada imagen, en el mismo orden (ver atlas.generate_atlas_maps).
+        output_root (str): El directorio de salida del lote.
+        mipmaps (str, optional): Formato de las cadenas de mipmaps, o None. Defaults to None.
+        composite (bool): Si también se guarda la imagen compuesta. Defaults to False.
+        light_intensity (float): La intensidad de la luz de la composición (0.0-1.0). Defaults to 1.0.
+        bit_depth (int): Profundidad de los mapas en escala de grises (8 o 16). Defaults to 8.
+        writers (int): La cantidad de hilos de escritura. Defaults to 2.
+        intermediates (list, optional): Los resultados intermedios de cada imagen devueltos por
+            atlas.generate_atlas_maps. Sin ellos, el mapa normal se reduce como los demás mapas
+            en los mipmaps. Defaults to None.
+        parameters (dict, optional): Valores de los sliders (0-100) con que se generaron los mapas,
+            para aplicar la intensidad normal a cada nivel de los mipmaps. Defaults to None.
+
+    Returns:
+        dict: Las rutas de los archivos escritos por imagen.
+    """
+    normal_intensity = pipeline.scale_parameters(parameters)['normal']
+    intermediates = intermediates or [{}] * len(sliced_maps)
+
+    def write(source_path, maps, tile_intermediates):
+        output_dir = output_dir_for(source_path, output_root)
+        paths = pipeline.save_maps(maps, output_dir, bit_depth=bit_depth)
+        if mipmaps:
+            paths += mipmap.export_mip_chains(maps, output_dir, mipmaps, normal_base=tile_intermediates.get('normal_base'),
+                                              normal_intensity=normal_intensity, bit_depth=bit_depth)
+        if composite:
+            paths.append(pipeline.save_composite(maps, output_dir, light_intensity))
+        return paths
+
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        futures = [executor.submit(write, source_path, maps, tile_intermediates)
+                   for source_path, maps, tile_intermediates in zip(source_paths, sliced_maps, intermediates)]
+        return {source_path: future.result() for source_path, future in zip(source_paths, futures)}
+
+def estimate_source_memory(source_path: str, resolutions: Sequence[int], parameters: Optional[Dict[str, float]] = None,
+                           composite: bool = False, scratch_dir: Optional[str] = None) -> int:
+    """
+    Estima el pico de memoria de process_source para una imagen (ver scheduler.estimate_job_memory).
+
+    Solo lee la cabecera de la imagen para conocer su tamaño, sin decodificarla.
+
+    Args:
+        source_path (str): La ruta de la imagen diffuse.
+        resolutions (list): Las resoluciones objetivo en píxeles.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        composite (bool): Si también se guarda la imagen compuesta. Defaults to False.
+        scratch_dir (str, optional): El directorio de los mapas intermedios, o None. Defaults to None.
+
+    Returns:
+        int: La memoria estimada en bytes.
+    """
+    with Image.open(source_path) as source_image:
+        source_size = source_image.size
+    values = pipeline.scale_parameters(parameters)
+    return scheduler.estimate_job_memory(max(resolutions), source_size, pipeline.MAP_NAMES, composite,
+                                         values['normal_levels'], bool(scratch_dir), resolutions)
+
+def collect_sources(paths: Sequence[str]) -> List[str]:
+    """
+    Expande los directorios indicados en la lista de imágenes que contienen.
+
+    Args:
+        paths (list): Rutas de imágenes o directorios.
+
+    Returns:
+        list: Las rutas de las imágenes a procesar.
+    """
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for file_name in sorted(os.listdir(path)):
+                if file_name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                    sources.append(os.path.join(path, file_name))
+        else:
+            sources.append(path)
+    return sources
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Construye el analizador de argumentos de la línea de comandos.
+
+    Returns:
+        argparse.ArgumentParser: El analizador configurado.
+    """
+    parser = argparse.ArgumentParser(description="Genera los mapas de texturas de varias imágenes diffuse.")
+    parser.add_argument("sources", nargs="+", help="Imágenes diffuse o directorios que las contienen.")
+    parser.add_argument("-o", "--output", required=True, help="Directorio de salida.")
+    parser.add_argument("-r", "--resolution", type=int, nargs="+", default=[1024], metavar="RESOLUCION",
+                        help="Resoluciones objetivo en píxeles (por defecto 1024). Con varias, los mapas se calculan "
+                             "una vez a la mayor y se reducen para las demás.")
+    parser.add_argument("--mipmaps", choices=mipmap.CONTAINERS, help="Exporta la cadena de mipmaps de cada mapa.")
+    parser.add_argument("--composite", action="store_true", help="Guarda también la imagen compuesta.")
+    parser.add_argument("--bit-depth", type=int, choices=pipeline.GREYSCALE_BIT_DEPTHS, default=8,
+                        help="Bits por píxel de los mapas en escala de grises (por defecto 8).")
+    parser.add_argument("--light-intensity", type=float, default=1.0, help="Intensidad de la luz de la composición (0-1, por defecto 1.0).")
+    parser.add_argument("--scratch-dir", help="Guarda los mapas intermedios en archivos mapeados en memoria dentro de este "
+                                              "directorio. No baja el pico de memoria, pero el sistema puede liberar "
+                                              "esas páginas si falta RAM.")
+    parser.add_argument("--atlas", action="store_true", help="Procesa las imágenes agrupadas en atlas (recomendado para "
+                                                             "texturas pequeñas, por ejemplo de 32 a 128 px).")
+    parser.add_argument("--atlas-size", type=int, default=256, help="Cantidad máxima de imágenes por atlas (por defecto 256).")
+    parser.add_argument("--readers", type=int, default=2, help="Hilos que leen y redimensionan las próximas imágenes (por defecto 2).")
+    parser.add_argument("--compute-threads", type=int, default=1, help="Imágenes cuyos mapas se generan a la vez, cada una en su "
+                                                                       "propio hilo (por defecto 1). Cada hilo mantiene en "
+                                                                       "memoria los mapas de su imagen.")
+    parser.add_argument("--writers", type=int, default=2, help="Hilos que guardan los mapas en segundo plano (por defecto 2).")
+    parser.add_argument("--prefetch", type=int, default=2, help="Imágenes leídas por adelantado que pueden esperar en memoria "
+                                                                "(por defecto 2).")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="Procesa las imágenes en paralelo sin superar esta memoria estimada (en MB), "
+                             "intercalando las texturas pequeñas alrededor de las grandes.")
+    parser.add_argument("--workers", type=int, help="Cantidad máxima de procesos con --memory-budget (por defecto, uno por núcleo).")
+    parser.add_argument("--calibration-log", help="Con --memory-budget, registra en este archivo el pico de memoria medido "
+                                                  "de cada imagen y lo usa para calibrar las estimaciones.")
+    for name, default in pipeline.DEFAULT_PARAMETERS.items():
+        value_type = {'choices': pipeline.PARAMETER_CHOICES[name]} if name in pipeline.PARAMETER_CHOICES else {'type': float}
+        parser.add_argument(f"--{name}", default=default, metavar="VALOR", **value_type,
+                            help=f"Valor del parámetro {name} (por defecto {default}).")
+    return parser
+
+def run_scheduled(sources: Sequence[str], args: argparse.Namespace, parameters: Dict[str, float]) -> List[Dict]:
+    """
+    Procesa las imágenes en procesos paralelos respetando el presupuesto de memoria.
+
+    Args:
+        sources (list): Las rutas de las imágenes diffuse.
+        args (argparse.Namespace): Los argumentos de la línea de comandos.
+        parameters (dict): Valores de los sliders (0-100) por nombre de mapa.
+
+    Returns:
+        list: Los registros de cada trabajo (ver scheduler.MemoryBudgetScheduler.run).
+    """
+    calibration = scheduler.load_calibration(args.calibration_log) if args.calibration_log else 1.0
+    jobs = []
+    for source_path in sources:
+        try:
+            estimate = estimate_source_memory(source_path, args.resolution, parameters, args.composite, args.scratch_dir)
+        except Exception as e:
+            print(f"Error al procesar {source_path}: {e}")
+            continue
+        jobs.append(scheduler.Job(source_path, estimate,
+                                  (source_path, args.output, args.resolution, parameters, args.mipmaps,
+                                   args.composite, args.light_intensity, args.scratch_dir, args.bit_depth)))
+
+    def report(record):
+        if record['error']:
+            print(f"Error al procesar {record['name']}: {record['error']}")
+            return
+        peak = f"{record['peak_rss'] / 2 ** 20:.0f} MB" if record['peak_rss'] else "no medido"
+        print(f"{record['name']}: {len(record['result'])} archivos generados "
+              f"(estimado {record['estimate'] * calibration / 2 ** 20:.0f} MB, pico {peak}).")
+
+    job_scheduler = scheduler.MemoryBudgetScheduler(int(args.memory_budget * 2 ** 20), args.workers, calibration)
+    records = job_scheduler.run(jobs, process_source, report)
+    if args.calibration_log:
+        scheduler.append_calibration_log(records, args.calibration_log)
+    return records
+
+def run_streaming(sources: Sequence[str], args: argparse.Namespace, parameters: Dict[str, float]) -> List[Dict]:
+    """
+    Procesa las imágenes superponiendo la lectura, el cálculo y la escritura (ver streaming.StreamingPipeline).
+
+    Mientras se calculan los mapas de una imagen, las siguientes ya se están leyendo
+    y los mapas anteriores se guardan en segundo plano. Al terminar, se informa la
+    utilización de cada etapa.
+
+    Args:
+        sources (list): Las rutas de las imágenes diffuse.
+        args (argparse.Namespace): Los argumentos de la línea de comandos.
+        parameters (dict): Valores de los sliders (0-100) por nombre de mapa.
+
+    Returns:
+        list: Los registros de cada imagen (ver streaming.StreamingPipeline.run).
+    """
+    stream = streaming.StreamingPipeline(
+        lambda source_path: load_source(source_path, args.resolution),
+        lambda source_path, diffuse_image: compute_source(source_path, diffuse_image, args.output, args.resolution,
+                                                          parameters, args.scratch_dir),
+        lambda source_path, computed: write_outputs(*computed, args.mipmaps, args.composite, args.light_intensity,
+                                                    args.bit_depth, parameters),
+        args.readers, args.compute_threads, args.writers, args.prefetch)
+
+    def report(record):
+        if record['error']:
+            print(f"Error al procesar {record['item']}: {record['error']}")
+        else:
+            print(f"{record['item']}: {len(record['result'])} archivos generados.")
+
+    records = stream.run(sources, report)
+    print(stream.report())
+    return records
+
+def run_atlas(sources: Sequence[str], args: argparse.Namespace, parameters: Dict[str, float]) -> List[Dict]:
+    """
+    Procesa las imágenes en atlas, superponiendo la lectura, el cálculo y la escritura de los grupos.
+
+    Cada grupo de hasta args.atlas_size imágenes es un elemento de un
+    streaming.StreamingPipeline: mientras se guardan los mapas recortados de un
+    grupo (con args.writers hilos, ver write_atlas_outputs), el siguiente ya se
+    está leyendo y generando.
+
+    Args:
+        sources (list): Las rutas de las imágenes diffuse.
+        args (argparse.Namespace): Los argumentos de la línea de comandos.
+        parameters (dict): Valores de los sliders (0-100) por nombre de mapa.
+
+    Returns:
+        list: Los registros de cada grupo (ver streaming.StreamingPipeline.run).
+    """
+    resolution = args.resolution[0]
+    groups = [tuple(sources[start:start + args.atlas_size]) for start in range(0, len(sources), args.atlas_size)]
+
+    def compute(group, diffuse_images):
+        # El campo de normales de cada textura solo hace falta para los mipmaps del mapa normal
+        intermediates = [] if args.mipmaps else None
+        return atlas.generate_atlas_maps(diffuse_images, parameters, intermediates=intermediates), intermediates
+
+    stream = streaming.StreamingPipeline(
+        lambda group: [pipeline.load_diffuse_image(source_path, resolution) for source_path in group],
+        compute,
+        lambda group, result: write_atlas_outputs(group, result[0], args.output, args.mipmaps, args.composite,
+                                                  args.light_intensity, args.bit_depth, args.writers, result[1],
+                                                  parameters),
+        args.readers, args.compute_threads, 1, args.prefetch)
+
+    def report(record):
+        group = record['item']
+        if record['error']:
+            print(f"Error al procesar el atlas que empieza en {group[0]}: {record['error']}")
+        else:
+            print(f"Atlas de {len(group)} imágenes: {sum(len(paths) for paths in record['result'].values())} archivos generados.")
+
+    records = stream.run(groups, report)
+    print(stream.report())
+    return records
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Punto de entrada de la línea de comandos para el procesamiento por lotes.
+
+    Args:
+        argv (list, optional): Los argumentos de la línea de comandos. Defaults to None.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    parameters = {name: getattr(args, name) for name in pipeline.DEFAULT_PARAMETERS}
+    sources = collect_sources(args.sources)
+
+    if min(args.readers, args.compute_threads, args.writers, args.prefetch) < 1:
+        parser.error("--readers, --compute-threads, --writers y --prefetch deben ser al menos 1.")
+
+    if args.atlas:
+        if len(set(args.resolution)) != 1 or args.scratch_dir or args.memory_budget:
+            parser.error("--atlas admite una sola resolución y no se combina con --scratch-dir ni --memory-budget.")
+        run_atlas(sources, args, parameters)
+        return
+
+    if args.memory_budget:
+        run_scheduled(sources, args, parameters)
+        return
+
+    run_streaming(sources, args, parameters)
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@
 #  License:     MIT License
 # ----------------------------------------------------------------------------
 
+import numpy as np
 from PIL import Image, ImageEnhance
-from typing import Optional
+from typing import Mapping, Optional
 
 def create_composite_image(diffuse_image: Image.Image, height_map: Image.Image, normal_map: Image.Image,
                            metallic_map: Image.Image, smoothness_map: Image.Image, edge_map: Image.Image,
@@ -20,8 +21,9 @@ def create_composite_image(diffuse_image: Image.Image, height_map: Image.Image,
 
     Este método toma como entrada los mapas de texturas generados (diffuse, altura, normal,
     metálico, suavidad, bordes y AO), los ajusta a una resolución única y combina los mapas
-    utilizando la función Image.blend de Pillow. También permite ajustar la intensidad de la luz
-    a la composición final.
+    utilizando la función Image.blend de Pillow. Los mapas en escala de grises se mantienen
+    con un solo canal y se expanden a RGB recién al mezclarlos. También permite ajustar la
+    intensidad de la luz a la composición final.
 
     Args:
         diffuse_image (PIL.Image.Image): La imagen diffuse.
@@ -53,6 +55,8 @@ def create_composite_image(diffuse_image: Image.Image, height_map: Image.Image,
         """
         Asegura que una imagen tenga la resolución y el modo de color correctos.
 
+        Las imágenes en escala de grises (modo L) se mantienen en ese modo; el resto se convierte a RGB.
+
         Args:
             image (PIL.Image.Image): La imagen a procesar.
             name (str): El nombre de la imagen para mensajes de log.
@@ -60,8 +64,8 @@ def create_composite_image(diffuse_image: Image.Image, height_map: Image.Image,
         Returns:
             PIL.Image.Image: La imagen procesada.
         """
-        # Convertir a RGB si no está en ese modo
-        if image.mode != 'RGB':
+        # Convertir a RGB si no está en ese modo ni en escala de grises
+        if image.mode not in ('RGB', 'L'):
             print(f"Convirtiendo {name} de modo {image.mode} a RGB")
             image = image.convert('RGB')
         # Redimensionar si las dimensiones no coinciden
@@ -81,26 +85,89 @@ def create_composite_image(diffuse_image: Image.Image, height_map: Image.Image,
     edge_map = ensure_resolution_and_mode(edge_map, "Edge")
     ao_map = ensure_resolution_and_mode(ao_map, "AO")
 
+    return blend_maps(diffuse_image, normal_map, edge_map, ao_map, light_intensity)
+
+def blend_maps(diffuse_image: Image.Image, normal_map: Image.Image, edge_map: Image.Image, ao_map: Image.Image,
+               light_intensity: float = 1.0, verbose: bool = True) -> Image.Image:
+    """
+    Sobrepone los mapas (del mismo tamaño) y ajusta la iluminación.
+
+    Los mapas en escala de grises (modo L) se expanden a RGB justo antes de
+    mezclarlos, uno por vez, en lugar de guardarse en RGB.
+
+    Args:
+        diffuse_image (PIL.Image.Image): La imagen diffuse (RGB).
+        normal_map (PIL.Image.Image): El mapa normal.
+        edge_map (PIL.Image.Image): El mapa de bordes.
+        ao_map (PIL.Image.Image): El mapa de oclusión ambiental.
+        light_intensity (float): La intensidad de la luz a aplicar (0.0-1.0). Defaults to 1.0.
+        verbose (bool): Si se muestran los mensajes de progreso. Defaults to True.
+
+    Returns:
+        PIL.Image.Image: La imagen compuesta resultante.
+    """
+    def log(message: str):
+        if verbose:
+            print(message)
+
+    def rgb(image: Image.Image) -> Image.Image:
+        return image if image.mode == 'RGB' else image.convert('RGB')
+
     # Sobreponer los mapas de textura
-    composite_image = Image.new('RGB', (width, height), color=(0,0,0))
-    print("Iniciando blending con Diffuse...")
-    composite_image = Image.blend(composite_image, diffuse_image, 0.75)
-    print("Blending con Diffuse completado.")
+    composite_image = Image.new('RGB', diffuse_image.size, color=(0,0,0))
+    log("Iniciando blending con Diffuse...")
+    composite_image = Image.blend(composite_image, rgb(diffuse_image), 0.75)
+    log("Blending con Diffuse completado.")
 
-    print("Iniciando blending con Normal...")
-    composite_image = Image.blend(composite_image, normal_map, 0.35)
-    print("Blending con Normal completado.")
+    log("Iniciando blending con Normal...")
+    composite_image = Image.blend(composite_image, rgb(normal_map), 0.35)
+    log("Blending con Normal completado.")
 
-    print("Iniciando blending con Edge...")
-    composite_image = Image.blend(composite_image, edge_map, 0.35)
-    print("Blending con Edge completado.")
+    log("Iniciando blending con Edge...")
+    composite_image = Image.blend(composite_image, rgb(edge_map), 0.35)
+    log("Blending con Edge completado.")
 
-    print("Iniciando blending con AO...")
-    composite_image = Image.blend(composite_image, ao_map, 0.35)
-    print("Blending con AO completado.")
+    log("Iniciando blending con AO...")
+    composite_image = Image.blend(composite_image, rgb(ao_map), 0.35)
+    log("Blending con AO completado.")
 
      # Ajustar la intensidad de la imagen usando brillo
     enhancer = ImageEnhance.Brightness(composite_image)
     composite_image = enhancer.enhance(light_intensity * 2) # Ajustamos el brillo por un factor
 
     return composite_image
+
+def create_composite_streaming(arrays: Mapping[str, np.ndarray], output: np.ndarray, light_intensity: float = 1.0,
+                               band_rows: int = 256) -> np.ndarray:
+    """
+    Crea la imagen compuesta recorriendo los mapas por bandas de filas.
+
+    Pensada para mapas respaldados por archivos mapeados en memoria (ver scratch.py):
+    los temporales de la mezcla tienen el tamaño de una banda, por lo que no hace
+    falta cargar los siete mapas completos ni sus copias en punto flotante. El resultado es el mismo que el de
+    create_composite_image para mapas que ya tienen la resolución correcta.
+
+    Args:
+        arrays (dict): Los arreglos uint8 'diffuse', 'normal', 'edge' y 'ao'
+            (alto x ancho para escala de grises, alto x ancho x 3 para RGB).
+        output (numpy.ndarray): El arreglo de salida (alto x ancho x 3, uint8).
+        light_intensity (float): La intensidad de la luz a aplicar (0.0-1.0). Defaults to 1.0.
+        band_rows (int): La cantidad de filas por banda. Defaults to 256.
+
+    Returns:
+        numpy.ndarray: El arreglo de salida.
+    """
+    height = output.shape[0]
+    for name in ('diffuse', 'normal', 'edge', 'ao'):
+        if arrays[name].shape[:2] != output.shape[:2]:
+            raise ValueError(f"El mapa {name} no tiene la resolución de la salida: {arrays[name].shape[:2]}")
+
+    def band_image(name: str, top: int, bottom: int) -> Image.Image:
+        return Image.fromarray(np.asarray(arrays[name][top:bottom]))
+
+    for top in range(0, height, band_rows):
+        bottom = min(height, top + band_rows)
+        band = blend_maps(band_image('diffuse', top, bottom), band_image('normal', top, bottom),
+                          band_image('edge', top, bottom), band_image('ao', top, bottom), light_intensity, verbose=False)
+        output[top:bottom] = np.asarray(band)
+    return output
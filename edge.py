@@ -9,51 +9,71 @@
 #  License:     MIT License
 # ----------------------------------------------------------------------------
 
+import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance
 
-def generate_edge_map(diffuse_image: Image.Image, smoothness_map: Image.Image, edge_intensity: float) -> Image.Image:
+def detect_edges(diffuse_image: Image.Image) -> Image.Image:
     """
-    Genera un mapa de bordes usando un filtro de contorno e influenciado por el mapa de suavidad.
+    Aplica el filtro de detección de bordes a la imagen diffuse en escala de grises.
 
-    Este mapa de bordes se crea aplicando un filtro de detección de bordes a la imagen
-    diffuse en escala de grises. Luego, los bordes se atenúan en función del mapa de
-    suavidad y su intensidad final se ajusta.
+    Esta es la parte del mapa de bordes que solo depende de la imagen diffuse,
+    por lo que puede calcularse una sola vez y reutilizarse.
 
     Args:
         diffuse_image (PIL.Image.Image): La imagen diffuse de entrada.
-        smoothness_map (PIL.Image.Image): El mapa de suavidad que influencia el resultado.
-        edge_intensity (float): La intensidad del brillo a aplicar al mapa de bordes (0-100).
 
     Returns:
-        PIL.Image.Image: El mapa de bordes generado.
+        PIL.Image.Image: Los bordes detectados (modo L).
     """
     # Convierte la imagen diffuse a escala de grises
     gray_image = diffuse_image.convert('L')
     # Aplica un filtro para detectar bordes
-    edge_map = gray_image.filter(ImageFilter.FIND_EDGES)
+    return gray_image.filter(ImageFilter.FIND_EDGES)
 
-    # Ajustar intensidad de los bordes en función del suavizado
-    width, height = edge_map.size
-    pixels_edge = edge_map.load()
-    pixels_smoothness = smoothness_map.load()
+def apply_edge_intensity(edge_base: Image.Image, smoothness_map: Image.Image, edge_intensity: float) -> Image.Image:
+    """
+    Atenúa los bordes detectados en función del mapa de suavidad y ajusta su intensidad.
 
-    for y in range(height):
-        for x in range(width):
-            smoothness_value = pixels_smoothness[x, y]
-            if isinstance(smoothness_value, tuple): # Se verifica que el valor de smoothness sea una tupla
-                smoothness_value = smoothness_value[0] # Si es una tupla, se obtiene el primer valor
+    Args:
+        edge_base (PIL.Image.Image): Los bordes generados por detect_edges (no se modifican).
+        smoothness_map (PIL.Image.Image): El mapa de suavidad que influencia el resultado.
+        edge_intensity (float): La intensidad del brillo a aplicar al mapa de bordes (0-100).
 
-            smoothness_value = smoothness_value / 255
+    Returns:
+        PIL.Image.Image: El mapa de bordes generado.
+    """
+    # Ajustar intensidad de los bordes en función del suavizado (sobre arreglos, la base no se modifica)
+    edge_values = np.asarray(edge_base, dtype=np.float64)
+    if edge_values.ndim == 3:  # Si el mapa tiene varios canales, se usa el primero
+        edge_values = edge_values[..., 0]
 
-            edge_value = pixels_edge[x, y]
-            if isinstance(edge_value, tuple):  # Se verifica que el valor de edge sea una tupla
-                edge_value = edge_value[0]  # Si es una tupla, se obtiene el primer valor
+    smoothness_values = np.asarray(smoothness_map)
+    if smoothness_values.ndim == 3:  # Si el mapa tiene varios canales, se usa el primero
+        smoothness_values = smoothness_values[..., 0]
+    smoothness_values = smoothness_values / 255
 
-            new_edge_value = int(edge_value * (1-smoothness_value))
-            pixels_edge[x, y] = new_edge_value
+    edge_map = Image.fromarray((edge_values * (1 - smoothness_values)).astype(np.uint8), 'L')
 
     # Ajustar intensidad usando brillo
     enhancer = ImageEnhance.Brightness(edge_map)
     edge_map = enhancer.enhance(edge_intensity * 0.01)  # Se multiplica el porcentaje por un valor para conseguir más brillo
 
     return edge_map
+
+def generate_edge_map(diffuse_image: Image.Image, smoothness_map: Image.Image, edge_intensity: float) -> Image.Image:
+    """
+    Genera un mapa de bordes usando un filtro de contorno e influenciado por el mapa de suavidad.
+
+    Este mapa de bordes se crea aplicando un filtro de detección de bordes a la imagen
+    diffuse en escala de grises. Luego, los bordes se atenúan en función del mapa de
+    suavidad y su intensidad final se ajusta.
+
+    Args:
+        diffuse_image (PIL.Image.Image): La imagen diffuse de entrada.
+        smoothness_map (PIL.Image.Image): El mapa de suavidad que influencia el resultado.
+        edge_intensity (float): La intensidad del brillo a aplicar al mapa de bordes (0-100).
+
+    Returns:
+        PIL.Image.Image: El mapa de bordes generado.
+    """
+    return apply_edge_intensity(detect_edges(diffuse_image), smoothness_map, edge_intensity)
@@ -11,6 +11,39 @@
 
 from PIL import Image, ImageOps, ImageEnhance
 
+def prepare_height_base(diffuse_image: Image.Image) -> Image.Image:
+    """
+    Convierte la imagen diffuse a escala de grises y aplica autocontraste.
+
+    Esta es la parte del mapa de altura que no depende del slider, por lo que
+    puede calcularse una sola vez y reutilizarse para varias intensidades.
+
+    Args:
+        diffuse_image (PIL.Image.Image): La imagen diffuse de entrada.
+
+    Returns:
+        PIL.Image.Image: La base del mapa de altura (modo L).
+    """
+    # Convierte la imagen diffuse a escala de grises
+    height_base = diffuse_image.convert('L')
+    # Aplica autocontraste para mejorar el rango dinámico
+    return ImageOps.autocontrast(height_base)
+
+def apply_height_intensity(height_base: Image.Image, height_percentage: float) -> Image.Image:
+    """
+    Ajusta el contraste de la base del mapa de altura según el slider.
+
+    Args:
+        height_base (PIL.Image.Image): La base generada por prepare_height_base.
+        height_percentage (float): El porcentaje de contraste a aplicar (0-100).
+
+    Returns:
+        PIL.Image.Image: El mapa de altura generado.
+    """
+    # Ajustar intensidad con un slider
+    enhancer = ImageEnhance.Contrast(height_base)
+    return enhancer.enhance(height_percentage * 0.1) # Se multiplica el porcentaje por un valor para conseguir más contraste
+
 def generate_height_map(diffuse_image: Image.Image, height_percentage: float) -> Image.Image:
     """
     Convierte la imagen diffuse a escala de grises y ajusta el contraste para un mapa de altura.
@@ -25,13 +58,4 @@ def generate_height_map(diffuse_image: Image.Image, height_percentage: float) ->
     Returns:
         PIL.Image.Image: El mapa de altura generado.
     """
-    # Convierte la imagen diffuse a escala de grises
-    height_map = diffuse_image.convert('L')
-    # Aplica autocontraste para mejorar el rango dinámico
-    height_map = ImageOps.autocontrast(height_map)
-
-    # Ajustar intensidad con un slider
-    enhancer = ImageEnhance.Contrast(height_map)
-    height_map = enhancer.enhance(height_percentage * 0.1) # Se multiplica el porcentaje por un valor para conseguir más contraste
-
-    return height_map
+    return apply_height_intensity(prepare_height_base(diffuse_image), height_percentage)
@@ -10,17 +10,12 @@
 # ----------------------------------------------------------------------------
 
 import tkinter as tk
-from tkinter import filedialog, ttk, messagebox
+from tkinter import filedialog, ttk, messagebox, simpledialog
 from PIL import Image, ImageTk
 import os
-import height
-import diffuse
-import normal
-import metallic
-import smoothness
-import edge
-import ao
 import composite  # Importar el módulo composite
+import pipeline  # Generación de todos los mapas
+import project  # Archivos de proyecto con los mapas en caché
 
 class TextureGeneratorApp:
     """
@@ -42,14 +37,21 @@ class TextureGeneratorApp:
         # Variables de configuración
         self.diffuse_image = None
         self.resized_diffuse_image = None
+        self.source_path = None  # Ruta de la imagen diffuse original, para los proyectos
+        self.source_hash = None  # Hash de la imagen original, calculado una sola vez
         self.generated_images = {}  # Almacenar los mapas generados
         self.labels_and_buttons = {}  # Almacenar referencias a labels y botones
         self.height_percentage = tk.IntVar(value=50)
         self.normal_intensity = tk.IntVar(value=50)
+        self.normal_kernel = tk.StringVar(value=pipeline.DEFAULT_PARAMETERS['normal_kernel'])
+        self.normal_levels = tk.IntVar(value=1)
         self.metallic_intensity = tk.IntVar(value=50)
         self.smoothness_intensity = tk.IntVar(value=50)
         self.edge_intensity = tk.IntVar(value=50)
         self.ao_intensity = tk.IntVar(value=50)
+        self.ao_radius = tk.IntVar(value=16)
+        self.ao_scales = tk.IntVar(value=4)
+        self.ao_strength = tk.IntVar(value=50)
         self.target_resolution = tk.IntVar(value=1024)
         self.selected_res_button = None
         self.light_intensity = tk.DoubleVar(value=1.0)  # Valor inicial del slider de iluminacion
@@ -79,6 +81,18 @@ class TextureGeneratorApp:
         self.composite_button.pack(side="right", pady=10)
         self.composite_button.pack_forget()  # Ocultar el botón hasta que se cargue una imagen
 
+        # Botón exportar varias resoluciones (solo visible si existe una imagen cargada)
+        self.export_tiers_button = tk.Button(self.top_bar_frame, text="Exportar Resoluciones", command=self.export_resolution_tiers)
+        self.export_tiers_button.pack(side="right", padx=5, pady=10)
+        self.export_tiers_button.pack_forget()  # Ocultar el botón hasta que se cargue una imagen
+
+        # Botones de proyecto (guardar solo visible si existe una imagen cargada)
+        self.save_project_button = tk.Button(self.top_bar_frame, text="Guardar Proyecto", command=self.save_project_file)
+        self.save_project_button.pack(side="right", padx=5, pady=10)
+        self.save_project_button.pack_forget()
+        self.open_project_button = tk.Button(self.top_bar_frame, text="Abrir Proyecto", command=self.open_project_file)
+        self.open_project_button.pack(side="right", padx=5, pady=10)
+
         # Botones de resolución
         resolutions = [32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
         self.resolution_buttons = {}
@@ -95,7 +109,7 @@ class TextureGeneratorApp:
 
         # Crear las pestañas y sus respectivos frames
         self.tab_frames = {}
-        for tab_name in ['diffuse', 'height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']:
+        for tab_name in pipeline.MAP_NAMES:
             frame = tk.Frame(self.notebook)
             self.notebook.add(frame, text=tab_name.capitalize())
             self.tab_frames[tab_name] = frame
@@ -105,7 +119,7 @@ class TextureGeneratorApp:
 
         # Barras laterales (frames) para todos los mapas (se crea un frame para cada mapa)
         self.sidebar_frames = {}
-        for tab_name in ['diffuse', 'height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']:
+        for tab_name in pipeline.MAP_NAMES:
              sidebar_frame = tk.Frame(self.tab_frames[tab_name], width=int(self.ancho_pantalla * 0.25))  # Ancho dinámico
              sidebar_frame.pack(side="left", fill="y")
              self.sidebar_frames[tab_name] = sidebar_frame
@@ -137,6 +151,15 @@ class TextureGeneratorApp:
         self.normal_plus_button = None
         self.create_slider_control(self.sidebar_frames['normal'], "Intensidad Normal (%)", self.normal_intensity, self.normal_slider, self.normal_minus_button, self.normal_plus_button)
 
+        # Núcleo y escalas del mapa normal (barra lateral del mapa normal)
+        normal_kernel_frame = tk.Frame(self.sidebar_frames['normal'])
+        normal_kernel_frame.pack(pady=5)
+        tk.Label(normal_kernel_frame, text="Núcleo:").pack(side="left")
+        tk.OptionMenu(normal_kernel_frame, self.normal_kernel, *pipeline.PARAMETER_CHOICES['normal_kernel'],
+                      command=self.on_slider_change).pack(side="left")
+        tk.Scale(self.sidebar_frames['normal'], from_=1, to=5, orient="horizontal", label="Escalas Normal",
+                 variable=self.normal_levels, command=self.on_slider_change).pack(pady=5)
+
          # Sliders para mapa metallic (barra lateral del mapa metallic)
         self.metallic_slider = None
         self.metallic_minus_button = None
@@ -161,6 +184,17 @@ class TextureGeneratorApp:
         self.ao_plus_button = None
         self.create_slider_control(self.sidebar_frames['ao'], "Intensidad AO (%)", self.ao_intensity, self.ao_slider, self.ao_minus_button, self.ao_plus_button)
 
+        # Ajustes de la oclusión calculada desde el mapa de altura (barra lateral del mapa ao)
+        self.ao_strength_slider = None
+        self.ao_strength_minus_button = None
+        self.ao_strength_plus_button = None
+        self.create_slider_control(self.sidebar_frames['ao'], "Fuerza AO (%)", self.ao_strength, self.ao_strength_slider, self.ao_strength_minus_button, self.ao_strength_plus_button)
+
+        tk.Scale(self.sidebar_frames['ao'], from_=1, to=128, orient="horizontal", label="Radio AO (px)",
+                 variable=self.ao_radius, command=self.on_slider_change).pack(pady=5)
+        tk.Scale(self.sidebar_frames['ao'], from_=1, to=8, orient="horizontal", label="Escalas AO",
+                 variable=self.ao_scales, command=self.on_slider_change).pack(pady=5)
+
         # Control para la intensidad de la luz (en la barra lateral del mapa diffuse)
         self.light_slider_frame = tk.Frame(self.sidebar_frames['diffuse'])
         self.light_slider_frame.pack(pady=5)
@@ -171,7 +205,7 @@ class TextureGeneratorApp:
 
         # Frame para las imágenes de todos los mapas de textura
         self.results_frames = {}
-        for tab_name in ['diffuse', 'height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']:
+        for tab_name in pipeline.MAP_NAMES:
            results_frame = tk.Frame(self.tab_frames[tab_name])
            results_frame.pack(side="left", expand=True, fill="both")
            self.results_frames[tab_name] = results_frame
@@ -227,7 +261,7 @@ class TextureGeneratorApp:
         """
         Crea la grilla para mostrar las imágenes de cada mapa de texturas.
         """
-        texture_names = ['diffuse', 'height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']
+        texture_names = pipeline.MAP_NAMES
         for tab_name in texture_names:
            row, col = 0, 0
            for i, name in enumerate(texture_names):
@@ -253,12 +287,12 @@ class TextureGeneratorApp:
 
     def disable_other_tabs(self):
         """Deshabilita todas las pestañas excepto la pestaña 'diffuse'."""
-        for tab_name in  ['height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']:
+        for tab_name in pipeline.MAP_NAMES[1:]:
              self.notebook.tab(self.tab_frames[tab_name], state="disabled")
 
     def enable_other_tabs(self):
         """Habilita todas las pestañas después de cargar la imagen 'diffuse'."""
-        for tab_name in  ['height', 'normal', 'metallic', 'smoothness', 'edge', 'ao']:
+        for tab_name in pipeline.MAP_NAMES[1:]:
              self.notebook.tab(self.tab_frames[tab_name], state="normal")
 
     def load_diffuse(self):
@@ -272,24 +306,91 @@ class TextureGeneratorApp:
         if file_path:
             try:
                 self.diffuse_image = Image.open(file_path)
+                self.source_path = file_path
+                self.source_hash = None
 
                 # Redimensionar a la resolución por defecto
                 target_res = self.target_resolution.get()
                 self.resized_diffuse_image = self.diffuse_image.resize((target_res, target_res), Image.Resampling.LANCZOS) # Redimensionar al cargar
 
                 self.generate_textures()
-                self.enable_other_tabs()
-                self.load_diffuse_button.config(text="Cambiar Diffuse")
-                self.composite_button.pack(side="right", pady=10) # Muestra el botón ver composición
-
-                # Crear botón Guardar Diffuse (si no existe)
-                if not self.save_diffuse_button:
-                   self.save_diffuse_button = tk.Button(self.sidebar_frames['diffuse'], text="Guardar Diffuse",
-                                        command=lambda type='diffuse': self.save_image(type))
-                   self.save_diffuse_button.pack(pady=10)
+                self.show_loaded_controls()
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar la imagen: {e}")
 
+    def show_loaded_controls(self):
+        """Habilita las pestañas y muestra los botones que requieren una imagen cargada."""
+        self.enable_other_tabs()
+        self.load_diffuse_button.config(text="Cambiar Diffuse")
+        self.composite_button.pack(side="right", pady=10) # Muestra el botón ver composición
+        self.export_tiers_button.pack(side="right", padx=5, pady=10) # Muestra el botón exportar resoluciones
+        self.save_project_button.pack(side="right", padx=5, pady=10) # Muestra el botón guardar proyecto
+
+        # Crear botón Guardar Diffuse (si no existe)
+        if not self.save_diffuse_button:
+           self.save_diffuse_button = tk.Button(self.sidebar_frames['diffuse'], text="Guardar Diffuse",
+                                command=lambda type='diffuse': self.save_image(type))
+           self.save_diffuse_button.pack(pady=10)
+
+    def save_project_file(self):
+        """
+        Guarda el proyecto actual: la imagen original, los sliders y los mapas generados en caché.
+        """
+        if not self.source_path or not self.generated_images:
+            messagebox.showwarning("Advertencia", "Por favor, carga una imagen Diffuse primero.")
+            return
+
+        file_path = filedialog.asksaveasfilename(defaultextension=project.PROJECT_EXTENSION,
+                                                 filetypes=[("Proyectos", f"*{project.PROJECT_EXTENSION}")])
+        if file_path:
+            try:
+                saved = project.save_project(file_path, self.source_path, self.generated_images, self.get_parameters(),
+                                             self.target_resolution.get(), float(self.light_intensity.get()), self.source_hash)
+                self.source_hash = saved['source_sha256']
+                messagebox.showinfo("Éxito", "Proyecto guardado exitosamente.")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar el proyecto: {e}")
+
+    def open_project_file(self):
+        """
+        Abre un proyecto guardado y muestra sus mapas.
+
+        Si la imagen original y la versión de los generadores no cambiaron, los mapas
+        y las miniaturas se leen de la caché del proyecto sin redimensionar ni
+        regenerar nada; en caso contrario se recalculan y se actualiza la caché.
+        """
+        file_path = filedialog.askopenfilename(filetypes=[("Proyectos", f"*{project.PROJECT_EXTENSION}")])
+        if not file_path:
+            return
+        try:
+            opened = project.load_project(file_path)
+            source_hash = project.file_sha256(opened['source'])
+
+            # Restaurar los controles sin regenerar (la imagen se asigna después)
+            self.resized_diffuse_image = None
+            self.set_parameters(opened['parameters'])
+            self.light_intensity.set(opened['light_intensity'])
+            self.set_resolution(opened['resolution'])
+
+            self.diffuse_image = pipeline.load_source_image(opened['source'])
+            self.source_path = opened['source']
+            self.source_hash = source_hash
+
+            if project.cache_is_valid(opened, source_hash):
+                self.generated_images, thumbnails = project.open_cached_maps(opened)
+                self.resized_diffuse_image = self.generated_images['diffuse']
+                self.show_loaded_controls()
+                self.root.update_idletasks()  # Para conocer el tamaño de los labels
+                self.display_results(thumbnails)
+            else:
+                self.resized_diffuse_image = pipeline.load_diffuse_image(opened['source'], opened['resolution'])
+                self.generate_textures()
+                self.show_loaded_controls()
+                project.save_project(file_path, self.source_path, self.generated_images, self.get_parameters(),
+                                     self.target_resolution.get(), float(self.light_intensity.get()), source_hash)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir el proyecto: {e}")
+
     def display_image(self, label, image):
         """
         Muestra una imagen en un label.
@@ -299,9 +400,26 @@ class TextureGeneratorApp:
             image (PIL.Image.Image): La imagen a mostrar.
         """
         image_resized = image.resize((200, 200)) # Redimensionar para display
-        photo = ImageTk.PhotoImage(image_resized)
-        label.config(image=photo)
-        label.image = photo  # Mantener referencia
+        self.update_label_photo(label, image_resized)
+
+    def update_label_photo(self, label, image):
+        """
+        Muestra una imagen en un label reutilizando el PhotoImage que ya tiene.
+
+        El PhotoImage solo se vuelve a crear cuando cambia el tamaño a mostrar;
+        en el resto de los casos se actualiza en su lugar con paste(), lo que evita
+        crear y descartar imágenes de Tk en cada movimiento de un slider.
+
+        Args:
+            label (tk.Label): El label donde se mostrará la imagen.
+            image (PIL.Image.Image): La imagen a mostrar, ya con el tamaño final.
+        """
+        photo = getattr(label, 'image', None)
+        if photo is None or (photo.width(), photo.height()) != image.size:
+            photo = ImageTk.PhotoImage('RGB', image.size)
+            label.config(image=photo)
+            label.image = photo  # Mantener referencia
+        photo.paste(image)
 
 
     def set_resolution(self, resolution):
@@ -334,21 +452,14 @@ class TextureGeneratorApp:
 
         target_res = self.target_resolution.get()
         # Generar todos los mapas de texturas
-        height_value = self.height_percentage.get() / 100.0
-        normal_value = self.normal_intensity.get() / 100.0
-        metallic_value = self.metallic_intensity.get() / 100.0
-        smoothness_value = self.smoothness_intensity.get() / 100.0
-        edge_value = self.edge_intensity.get() / 100.0
-        ao_value = self.ao_intensity.get() / 100.0
-
-
-        diffuse_image = diffuse.process_diffuse(self.resized_diffuse_image)
-        height_map = height.generate_height_map(self.resized_diffuse_image, height_value)
-        normal_map = normal.generate_normal_map(height_map, normal_value)
-        metallic_map = metallic.generate_metallic_map(self.resized_diffuse_image, metallic_value)
-        smoothness_map = smoothness.generate_smoothness_map(self.resized_diffuse_image, smoothness_value)
-        edge_map = edge.generate_edge_map(self.resized_diffuse_image, smoothness_map, edge_value)
-        ao_map = ao.generate_ao_map(self.resized_diffuse_image, ao_value)
+        maps = pipeline.generate_maps(self.resized_diffuse_image, self.get_parameters())
+        diffuse_image = maps['diffuse']
+        height_map = maps['height']
+        normal_map = maps['normal']
+        metallic_map = maps['metallic']
+        smoothness_map = maps['smoothness']
+        edge_map = maps['edge']
+        ao_map = maps['ao']
 
         # Crear imagen compuesta con la función del módulo
         composite_image = composite.create_composite_image(diffuse_image, height_map, normal_map, metallic_map, smoothness_map, edge_map, ao_map, target_res, float(self.light_intensity.get())) # Pasa la resolución seleccionada y la intensidad de la luz
@@ -383,28 +494,51 @@ class TextureGeneratorApp:
 
             return
 
-         # Obtener la resolución objetivo
-         target_res = self.target_resolution.get()
-
          # Generar todos los mapas de texturas
-         height_value = self.height_percentage.get() / 100.0
-         normal_value = self.normal_intensity.get() / 100.0
-         metallic_value = self.metallic_intensity.get() / 100.0
-         smoothness_value = self.smoothness_intensity.get() / 100.0
-         edge_value = self.edge_intensity.get() / 100.0
-         ao_value = self.ao_intensity.get() / 100.0
-
-
-         self.generated_images['diffuse'] = diffuse.process_diffuse(self.resized_diffuse_image) # No es necesaria, pero se añade por consistencia
-         self.generated_images['height'] = height.generate_height_map(self.resized_diffuse_image, height_value)
-         self.generated_images['normal'] = normal.generate_normal_map(self.generated_images['height'], normal_value)
-         self.generated_images['metallic'] = metallic.generate_metallic_map(self.resized_diffuse_image, metallic_value)
-         self.generated_images['smoothness'] = smoothness.generate_smoothness_map(self.resized_diffuse_image, smoothness_value)
-         self.generated_images['edge'] = edge.generate_edge_map(self.resized_diffuse_image, self.generated_images['smoothness'], edge_value)
-         self.generated_images['ao'] = ao.generate_ao_map(self.resized_diffuse_image, ao_value)
+         self.generated_images = pipeline.generate_maps(self.resized_diffuse_image, self.get_parameters())
 
          self.display_results()
 
+    def get_parameters(self):
+         """
+         Devuelve los valores actuales de los sliders por nombre de mapa.
+
+         Returns:
+            dict: Valores de los sliders (0-100) con el formato de pipeline.DEFAULT_PARAMETERS.
+         """
+         return {
+             'height': self.height_percentage.get(),
+             'normal': self.normal_intensity.get(),
+             'metallic': self.metallic_intensity.get(),
+             'smoothness': self.smoothness_intensity.get(),
+             'edge': self.edge_intensity.get(),
+             'ao': self.ao_intensity.get(),
+             'ao_radius': self.ao_radius.get(),
+             'ao_scales': self.ao_scales.get(),
+             'ao_strength': self.ao_strength.get(),
+             'normal_kernel': self.normal_kernel.get(),
+             'normal_levels': self.normal_levels.get(),
+         }
+
+    def set_parameters(self, parameters):
+         """
+         Ajusta los sliders a los valores indicados, sin regenerar los mapas.
+
+         Args:
+            parameters (dict): Valores de los sliders (0-100) con el formato de pipeline.DEFAULT_PARAMETERS.
+         """
+         self.height_percentage.set(parameters['height'])
+         self.normal_intensity.set(parameters['normal'])
+         self.metallic_intensity.set(parameters['metallic'])
+         self.smoothness_intensity.set(parameters['smoothness'])
+         self.edge_intensity.set(parameters['edge'])
+         self.ao_intensity.set(parameters['ao'])
+         self.ao_radius.set(parameters['ao_radius'])
+         self.ao_scales.set(parameters['ao_scales'])
+         self.ao_strength.set(parameters['ao_strength'])
+         self.normal_kernel.set(parameters['normal_kernel'])
+         self.normal_levels.set(parameters['normal_levels'])
+
     def on_slider_change(self, value):
         """
         Callback para el evento de cambio en los sliders.
@@ -443,6 +577,8 @@ class TextureGeneratorApp:
             self.height_percentage.set(50)
         elif texture_type == 'normal':
             self.normal_intensity.set(50)
+            self.normal_kernel.set(pipeline.DEFAULT_PARAMETERS['normal_kernel'])
+            self.normal_levels.set(1)
         elif texture_type == 'metallic':
              self.metallic_intensity.set(50)
         elif texture_type == 'smoothness':
@@ -451,17 +587,26 @@ class TextureGeneratorApp:
             self.edge_intensity.set(50)
         elif texture_type == 'ao':
              self.ao_intensity.set(50)
+             self.ao_radius.set(16)
+             self.ao_scales.set(4)
+             self.ao_strength.set(50)
 
         if self.resized_diffuse_image:
             self.generate_textures()
 
-    def display_results(self):
+    def display_results(self, images=None):
         """
         Muestra las imágenes de los mapas de texturas en la interfaz.
 
         Redimensiona las imágenes para que se ajusten a los labels y las muestra.
+
+        Args:
+            images (dict, optional): Las imágenes a mostrar por nombre de mapa (por ejemplo,
+                las miniaturas de un proyecto). Si es None, los mapas generados. Defaults to None.
         """
-        for texture_type, texture_image in self.generated_images.items():
+        if images is None:
+            images = self.generated_images
+        for texture_type, texture_image in images.items():
             label, _ = self.labels_and_buttons[texture_type]
 
             # Redimensionar la imagen al máximo disponible manteniendo la proporción
@@ -473,15 +618,28 @@ class TextureGeneratorApp:
 
                 if width > 0 and height > 0 : # Verificar que los valores de width y height no sean 0
 
-                     image_resized = texture_image
-                     image_resized.thumbnail((width,height)) # Redimensionar al máximo posible
-                     photo = ImageTk.PhotoImage(image_resized)
-
-                     label.config(image=photo)
-                     label.image = photo
+                     # Redimensionar al máximo posible sobre una copia, sin modificar el mapa generado
+                     image_resized = texture_image.resize(self.fit_size(texture_image.size, (width, height)), Image.Resampling.BICUBIC, reducing_gap=2.0)
+                     self.update_label_photo(label, image_resized)
                 else:
                    print(f"Error al redimensionar {texture_type}, width y/o height = 0")
 
+    def fit_size(self, image_size, box_size):
+        """
+        Calcula el tamaño máximo que entra en un recuadro manteniendo la proporción.
+
+        Igual que Image.thumbnail, nunca agranda la imagen.
+
+        Args:
+            image_size (tuple): El tamaño original (ancho, alto).
+            box_size (tuple): El tamaño disponible (ancho, alto).
+
+        Returns:
+            tuple: El tamaño a mostrar (ancho, alto).
+        """
+        scale = min(1.0, box_size[0] / image_size[0], box_size[1] / image_size[1])
+        return (max(1, round(image_size[0] * scale)), max(1, round(image_size[1] * scale)))
+
     def update_composite_window(self, label, diffuse_image, height_map, normal_map, metallic_map, smoothness_map, edge_map, ao_map, target_res, light_value):
         """
          Actualiza la imagen de la ventana de composición al modificar el slider de iluminación.
@@ -519,6 +677,35 @@ class TextureGeneratorApp:
                messagebox.showerror("Error", f"Error al guardar la imagen compuesta: {e}")
 
 
+    def export_resolution_tiers(self):
+        """
+        Exporta todos los mapas en varias resoluciones en una sola ejecución.
+
+        Los mapas se calculan una vez a la resolución más alta indicada y las demás
+        se obtienen reduciendo esos mapas, en lugar de regenerar todo por resolución.
+        """
+        if not self.diffuse_image:
+            messagebox.showwarning("Advertencia", "Por favor, carga una imagen Diffuse primero.")
+            return
+
+        text = simpledialog.askstring("Exportar Resoluciones", "Resoluciones separadas por coma:", initialvalue="512,1024,2048", parent=self.root)
+        if not text:
+            return
+        try:
+            resolutions = [int(value) for value in text.replace(" ", "").split(",") if value]
+        except ValueError:
+            messagebox.showerror("Error", f"Resoluciones inválidas: {text}")
+            return
+
+        output_dir = filedialog.askdirectory()
+        if output_dir:
+            try:
+                tiers = pipeline.generate_resolution_tiers(self.diffuse_image, resolutions, self.get_parameters())
+                pipeline.save_resolution_tiers(tiers, output_dir)
+                messagebox.showinfo("Éxito", f"Mapas exportados en {len(tiers)} resoluciones.")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al exportar las resoluciones: {e}")
+
     def save_image(self, texture_type):
        """
        Guarda una imagen de un mapa de textura específico en un archivo.
@@ -13,7 +13,7 @@ from PIL import Image, ImageEnhance
 
 def generate_metallic_map(diffuse_image: Image.Image, metallic_intensity: float) -> Image.Image:
     """
-    Genera un mapa metálico donde todo es blanco (puede ajustarse) en formato RGB.
+    Genera un mapa metálico donde todo es blanco (puede ajustarse) en escala de grises (modo L).
 
     Este mapa se utiliza para indicar qué partes de la superficie son metálicas.
     Por defecto, genera una imagen completamente blanca que puede ser ajustada en intensidad.
@@ -27,7 +27,7 @@ def generate_metallic_map(diffuse_image: Image.Image, metallic_intensity: float)
     """
     width, height = diffuse_image.size
     # Crear una imagen completamente blanca
-    metallic_map = Image.new('RGB', (width, height), color=(255, 255, 255))
+    metallic_map = Image.new('L', (width, height), color=255)
 
     # Ajustar intensidad usando brillo
     enhancer = ImageEnhance.Brightness(metallic_map)
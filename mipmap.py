@@ -0,0 +1,168 @@
+# ----------------------------------------------------------------------------
+#  File:        mipmap.py
+#  Module:      Mipmap
+#  Description: Módulo para generar y exportar cadenas de mipmaps de los mapas.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import json
+import os
+import numpy as np
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+import normal
+import pipeline
+
+# Mapas cuyos píxeles codifican vectores unitarios y deben renormalizarse al reducirse.
+# El mapa 'normal' final ya tiene aplicado el contraste de intensidad y no codifica
+# vectores unitarios, así que se reduce como cualquier otro mapa; para reducirlo sin
+# cambiar su aspecto se reduce el campo de normales y se vuelve a aplicar la intensidad.
+VECTOR_MAPS = {'normal_base'}
+
+# Formatos de exportación admitidos para las cadenas de mipmaps
+CONTAINERS = ('tiff', 'directory')
+
+def downsample_map(image: Image.Image, size: Tuple[int, int], map_type: str,
+                   resample: Image.Resampling = Image.Resampling.BOX) -> Image.Image:
+    """
+    Reduce un mapa a un tamaño menor usando el filtrado adecuado para su tipo.
+
+    Los mapas de color y escala de grises se reducen directamente con el filtro indicado.
+    Los campos de normales sin ajuste de intensidad (VECTOR_MAPS) se decodifican a
+    vectores, se promedian por área (BOX) y se renormalizan, ya que promediar los
+    colores codificados acorta los vectores.
+
+    Args:
+        image (PIL.Image.Image): El mapa a reducir.
+        size (tuple): El tamaño destino (ancho, alto).
+        map_type (str): El nombre del mapa (por ejemplo 'normal_base' o 'height').
+        resample (PIL.Image.Resampling): El filtro para los mapas que no son vectoriales. Defaults to BOX.
+
+    Returns:
+        PIL.Image.Image: El mapa reducido.
+    """
+    if map_type not in VECTOR_MAPS:
+        return image.resize(size, resample)
+
+    vectors = normal.decode_normal_vectors(image)
+    channels = [np.asarray(Image.fromarray(np.ascontiguousarray(vectors[..., i]), 'F').resize(size, Image.Resampling.BOX))
+                for i in range(3)]
+    return normal.encode_normal_vectors(np.stack(channels, axis=2))
+
+def generate_mip_chain(image: Image.Image, map_type: str) -> List[Image.Image]:
+    """
+    Genera la cadena completa de mipmaps de un mapa, hasta 1x1.
+
+    Cada nivel se obtiene reduciendo a la mitad el nivel anterior (no la imagen
+    original), por lo que el costo total es aproximadamente un tercio del nivel 0.
+
+    Args:
+        image (PIL.Image.Image): El mapa a resolución completa (nivel 0).
+        map_type (str): El nombre del mapa, para elegir el filtrado adecuado.
+
+    Returns:
+        list: Los niveles de la cadena, empezando por la imagen original.
+    """
+    chain = [image]
+    while chain[-1].size != (1, 1):
+        width, height = chain[-1].size
+        size = (max(1, width // 2), max(1, height // 2))
+        chain.append(downsample_map(chain[-1], size, map_type))
+    return chain
+
+def generate_normal_mip_chain(normal_map: Image.Image, normal_base: Image.Image, normal_intensity: float) -> List[Image.Image]:
+    """
+    Genera la cadena de mipmaps del mapa normal a partir del campo de normales sin ajuste de intensidad.
+
+    Cada nivel del campo de normales se reduce y renormaliza, y luego se le aplica la
+    misma intensidad que al mapa normal, de modo que todos los niveles conservan su aspecto.
+
+    Args:
+        normal_map (PIL.Image.Image): El mapa normal final (nivel 0).
+        normal_base (PIL.Image.Image): El campo de normales del que se obtuvo (ver normal.compute_normal_base).
+        normal_intensity (float): La intensidad con que se generó el mapa normal.
+
+    Returns:
+        list: Los niveles de la cadena, empezando por el mapa normal.
+    """
+    base_chain = generate_mip_chain(normal_base, 'normal_base')
+    return [normal_map] + [normal.apply_normal_intensity(level, normal_intensity) for level in base_chain[1:]]
+
+def save_mip_chain_tiff(chain: List[Image.Image], file_path: str):
+    """
+    Guarda una cadena de mipmaps como un TIFF de varias imágenes (un nivel por página).
+
+    Args:
+        chain (list): Los niveles de la cadena.
+        file_path (str): La ruta del archivo TIFF.
+    """
+    chain[0].save(file_path, format='TIFF', save_all=True, append_images=chain[1:])
+
+def save_mip_chain_directory(chain: List[Image.Image], output_dir: str, name: str) -> str:
+    """
+    Guarda cada nivel de una cadena de mipmaps como PNG junto con un índice JSON.
+
+    Args:
+        chain (list): Los niveles de la cadena.
+        output_dir (str): El directorio de salida.
+        name (str): El nombre del mapa, usado como prefijo de los archivos.
+
+    Returns:
+        str: La ruta del índice JSON.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    levels = []
+    for level, image in enumerate(chain):
+        file_name = f"{name}_mip{level}.png"
+        image.save(os.path.join(output_dir, file_name))
+        levels.append({'level': level, 'width': image.size[0], 'height': image.size[1], 'file': file_name})
+
+    index_path = os.path.join(output_dir, f"{name}_mips.json")
+    with open(index_path, 'w', encoding='utf-8') as index_file:
+        json.dump({'map': name, 'levels': levels}, index_file, indent=2)
+    return index_path
+
+def export_mip_chains(maps: Dict[str, Image.Image], output_dir: str, container: str = 'tiff', prefix: str = "",
+                      normal_base: Optional[Image.Image] = None, normal_intensity: Optional[float] = None,
+                      bit_depth: int = 8) -> List[str]:
+    """
+    Genera y guarda la cadena de mipmaps de cada mapa a partir de las imágenes en memoria.
+
+    Si se indica el campo de normales, la cadena del mapa normal se construye con
+    generate_normal_mip_chain; si no, el mapa normal se reduce como los demás.
+
+    Args:
+        maps (dict): Los mapas a resolución completa por nombre.
+        output_dir (str): El directorio de salida.
+        container (str): 'tiff' para un TIFF por mapa, 'directory' para PNG más índice. Defaults to 'tiff'.
+        prefix (str): Prefijo para los nombres de archivo. Defaults to "".
+        normal_base (PIL.Image.Image, optional): El campo de normales del mapa normal. Defaults to None.
+        normal_intensity (float, optional): La intensidad del mapa normal (necesaria con normal_base). Defaults to None.
+        bit_depth (int): Profundidad de los niveles de los mapas en escala de grises (8 o 16,
+            ver pipeline.to_bit_depth). Defaults to 8.
+
+    Returns:
+        list: Las rutas de los TIFF o índices escritos.
+    """
+    if container not in CONTAINERS:
+        raise ValueError(f"Formato de mipmaps desconocido: {container}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, image in maps.items():
+        if name == 'normal' and normal_base is not None:
+            chain = generate_normal_mip_chain(image, normal_base, normal_intensity)
+        else:
+            chain = generate_mip_chain(image, name)
+        chain = [pipeline.to_bit_depth(level, bit_depth) for level in chain]
+        if container == 'tiff':
+            path = os.path.join(output_dir, f"{prefix}{name}_mips.tif")
+            save_mip_chain_tiff(chain, path)
+        else:
+            path = save_mip_chain_directory(chain, os.path.join(output_dir, f"{prefix}{name}_mips"), f"{prefix}{name}")
+        paths.append(path)
+    return paths
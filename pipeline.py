@@ -0,0 +1,341 @@
+# ----------------------------------------------------------------------------
+#  File:        pipeline.py
+#  Module:      Pipeline
+#  Description: Módulo para generar y exportar todos los mapas sin interfaz gráfica.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import os
+import numpy as np
+from collections.abc import MutableMapping
+from PIL import Image
+from typing import Dict, List, Optional, Sequence
+import height
+import diffuse
+import normal
+import metallic
+import smoothness
+import edge
+import ao
+import composite
+import mipmap
+import scratch
+import stages
+from stages import SOURCE, Stage
+
+# Generadores de cada mapa, con sus entradas y parámetros (ver register_map)
+STAGES = stages.StageRegistry()
+# Los pasos con export=False separan la parte costosa de un mapa del ajuste de
+# intensidad, para que un barrido de parámetros (ver sweep.py) la calcule una sola vez
+STAGES.register(Stage('diffuse', diffuse.process_diffuse))
+STAGES.register(Stage('height_base', height.prepare_height_base, export=False))
+STAGES.register(Stage('height', height.apply_height_intensity, ('height_base',), ('height',)))
+# El campo de normales sin ajuste de intensidad se conserva aparte para reducirlo (ver generate_resolution_tiers)
+STAGES.register(Stage('normal_base', normal.compute_normal_base, ('height',), ('normal_kernel', 'normal_levels'), export=False))
+STAGES.register(Stage('normal', normal.apply_normal_intensity, ('normal_base',), ('normal',)))
+STAGES.register(Stage('metallic', metallic.generate_metallic_map, parameters=('metallic',)))
+STAGES.register(Stage('smoothness', smoothness.generate_smoothness_map, parameters=('smoothness',)))
+STAGES.register(Stage('edge_base', edge.detect_edges, export=False))
+STAGES.register(Stage('edge', edge.apply_edge_intensity, ('edge_base', 'smoothness'), ('edge',)))
+STAGES.register(Stage('occlusion', ao.compute_occlusion, ('height',), ('ao_radius', 'ao_scales', 'ao_strength'), export=False))
+STAGES.register(Stage('ao', ao.apply_ao_intensity, ('occlusion',), ('ao',)))
+
+# Nombres de los mapas en el orden en que se muestran y exportan (incluye los registrados después)
+MAP_NAMES = STAGES.names
+
+# Versión de los generadores. Se incrementa cada vez que cambia el resultado de algún
+# mapa, para que los mapas guardados en caché (ver project.py) se vuelvan a calcular.
+GENERATOR_VERSION = 5
+
+# Valores por defecto de los sliders (0-100), iguales a los de la interfaz
+DEFAULT_PARAMETERS = {
+    'height': 50,
+    'normal': 50,
+    'metallic': 50,
+    'smoothness': 50,
+    'edge': 50,
+    'ao': 50,
+    'ao_radius': 16,
+    'ao_scales': 4,
+    'ao_strength': 50,
+    'normal_kernel': normal.DEFAULT_KERNEL,
+    'normal_levels': 1,
+}
+
+# Parámetros que no son porcentajes: se pasan a los generadores como enteros, sin escalar
+UNSCALED_PARAMETERS = {'ao_radius', 'ao_scales', 'normal_levels'}
+
+# Parámetros que se eligen de una lista de opciones y se pasan tal cual
+PARAMETER_CHOICES = {'normal_kernel': tuple(normal.KERNELS)}
+
+# Profundidades de bits con que pueden exportarse los mapas en escala de grises
+GREYSCALE_BIT_DEPTHS = (8, 16)
+
+def register_map(stage: Stage, defaults: Optional[Dict[str, float]] = None):
+    """
+    Registra un nuevo tipo de mapa, que se genera, muestra y exporta junto a los demás.
+
+    Args:
+        stage (stages.Stage): El paso que genera el mapa.
+        defaults (dict, optional): Valores por defecto (0-100) de los parámetros nuevos
+            que usa el paso. Defaults to None.
+    """
+    missing = set(stage.parameters) - set(DEFAULT_PARAMETERS) - set(defaults or {})
+    if missing:
+        raise ValueError(f"Parámetros sin valor por defecto: {', '.join(sorted(missing))}")
+    STAGES.register(stage)
+    DEFAULT_PARAMETERS.update(defaults or {})
+
+def load_diffuse_image(file_path: str, resolution: int) -> Image.Image:
+    """
+    Carga una imagen diffuse desde un archivo y la redimensiona a la resolución objetivo.
+
+    Args:
+        file_path (str): La ruta de la imagen diffuse.
+        resolution (int): La resolución objetivo en píxeles.
+
+    Returns:
+        PIL.Image.Image: La imagen diffuse redimensionada.
+    """
+    diffuse_image = load_source_image(file_path)
+    return diffuse_image.resize((resolution, resolution), Image.Resampling.LANCZOS)
+
+def load_source_image(file_path: str) -> Image.Image:
+    """
+    Carga una imagen diffuse desde un archivo sin redimensionarla.
+
+    Args:
+        file_path (str): La ruta de la imagen diffuse.
+
+    Returns:
+        PIL.Image.Image: La imagen diffuse original.
+    """
+    return Image.open(file_path)
+
+def resolve_parameters(parameters: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Completa los parámetros indicados con los valores por defecto.
+
+    Args:
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+
+    Returns:
+        dict: Los valores de todos los sliders.
+    """
+    resolved = dict(DEFAULT_PARAMETERS)
+    if parameters:
+        unknown = set(parameters) - set(DEFAULT_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+        resolved.update(parameters)
+    return resolved
+
+def scale_parameters(parameters: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Convierte los valores de los sliders en los valores que reciben los generadores.
+
+    Los porcentajes (0-100) se dividen por 100, igual que en la interfaz; los
+    parámetros de UNSCALED_PARAMETERS se pasan como enteros y los de
+    PARAMETER_CHOICES se pasan tal cual.
+
+    Args:
+        parameters (dict, optional): Valores de los sliders por nombre. Defaults to None.
+
+    Returns:
+        dict: Los valores escalados de todos los parámetros.
+    """
+    values = {}
+    for name, value in resolve_parameters(parameters).items():
+        if name in PARAMETER_CHOICES:
+            if value not in PARAMETER_CHOICES[name]:
+                raise ValueError(f"Valor inválido para {name}: {value}")
+            values[name] = value
+        elif name in UNSCALED_PARAMETERS:
+            values[name] = int(value)
+        else:
+            values[name] = value / 100.0
+    return values
+
+def generate_maps(diffuse_image: Image.Image, parameters: Optional[Dict[str, float]] = None,
+                  scratch: Optional[MutableMapping] = None, max_workers: Optional[int] = None,
+                  intermediates: Optional[Dict[str, Image.Image]] = None) -> MutableMapping:
+    """
+    Genera todos los mapas de texturas a partir de una imagen diffuse ya redimensionada.
+
+    Los parámetros se expresan igual que los sliders de la interfaz (0-100) y se
+    escalan de la misma forma antes de pasarlos a cada generador. Los mapas que
+    no dependen entre sí se generan en paralelo (ver stages.StageRegistry.run).
+
+    Args:
+        diffuse_image (PIL.Image.Image): La imagen diffuse de entrada.
+        parameters (dict, optional): Valores de los sliders por nombre de mapa. Defaults to None.
+        scratch (scratch.ScratchStore, optional): Si se indica, cada mapa se escribe en
+            este almacén mapeado en memoria apenas se genera, y los generadores siguientes
+            leen desde él. Defaults to None.
+        max_workers (int, optional): La cantidad de hilos; 1 para generar los mapas uno
+            tras otro. Si es None, stages.DEFAULT_WORKERS. Defaults to None.
+        intermediates (dict, optional): Si se indica, recibe los resultados intermedios,
+            como 'normal_base' (el campo de normales sin ajuste de intensidad). Defaults to None.
+
+    Returns:
+        dict: Los mapas generados por nombre, en el orden de MAP_NAMES (el propio
+        almacén si se indicó scratch).
+    """
+    values = scale_parameters(parameters)
+    return STAGES.run(diffuse_image, values, scratch, max_workers, intermediates)
+
+def generate_resolution_tiers(source_image: Image.Image, resolutions: Sequence[int],
+                              parameters: Optional[Dict[str, float]] = None,
+                              scratch: Optional[MutableMapping] = None,
+                              intermediates: Optional[Dict[int, Dict[str, Image.Image]]] = None) -> Dict[int, MutableMapping]:
+    """
+    Genera los mapas para varias resoluciones calculándolos una sola vez.
+
+    Los mapas se generan a la resolución más alta pedida y las resoluciones menores
+    se obtienen reduciendo esos mapas con el filtrado adecuado para cada uno
+    (ver mipmap.downsample_map), en lugar de repetir todo el proceso por resolución.
+    El mapa normal de cada resolución se obtiene reduciendo el campo de normales sin
+    ajuste de intensidad y aplicándole luego la intensidad, para que todas las
+    resoluciones tengan el mismo aspecto.
+
+    Args:
+        source_image (PIL.Image.Image): La imagen diffuse original (sin redimensionar).
+        resolutions (list): Las resoluciones objetivo en píxeles.
+        parameters (dict, optional): Valores de los sliders (0-100) por nombre de mapa. Defaults to None.
+        scratch (scratch.ScratchStore, optional): Almacén para los mapas de la resolución
+            más alta (ver generate_maps). Defaults to None.
+        intermediates (dict, optional): Si se indica, recibe los resultados intermedios de
+            cada resolución (ver generate_maps). Defaults to None.
+
+    Returns:
+        dict: Los mapas generados por resolución.
+    """
+    if not resolutions:
+        raise ValueError("Se necesita al menos una resolución.")
+
+    ordered = sorted(set(resolutions), reverse=True)
+    highest = ordered[0]
+    diffuse_image = source_image.resize((highest, highest), Image.Resampling.LANCZOS)
+
+    if intermediates is None:
+        intermediates = {}
+    values = scale_parameters(parameters)
+    intermediates[highest] = {}
+    tiers = {highest: generate_maps(diffuse_image, parameters, scratch, intermediates=intermediates[highest])}
+    normal_base = intermediates[highest]['normal_base']
+    for resolution in ordered[1:]:
+        size = (resolution, resolution)
+        maps = {}
+        for name, image in tiers[highest].items():
+            if name == 'normal':
+                intermediates[resolution] = {'normal_base': mipmap.downsample_map(normal_base, size, 'normal_base')}
+                maps[name] = normal.apply_normal_intensity(intermediates[resolution]['normal_base'], values['normal'])
+            else:
+                maps[name] = mipmap.downsample_map(image, size, name, Image.Resampling.LANCZOS)
+        tiers[resolution] = maps
+    return tiers
+
+def save_resolution_tiers(tiers: Dict[int, MutableMapping], output_dir: str, prefix: str = "", bit_depth: int = 8) -> List[str]:
+    """
+    Guarda los mapas de cada resolución en un subdirectorio propio (por ejemplo "1024px").
+
+    Args:
+        tiers (dict): Los mapas por resolución devueltos por generate_resolution_tiers.
+        output_dir (str): El directorio de salida.
+        prefix (str): Prefijo para los nombres de archivo. Defaults to "".
+        bit_depth (int): Profundidad de los mapas en escala de grises (ver save_maps). Defaults to 8.
+
+    Returns:
+        list: Las rutas de los archivos escritos.
+    """
+    paths = []
+    for resolution, maps in sorted(tiers.items()):
+        paths += save_maps(maps, os.path.join(output_dir, f"{resolution}px"), prefix, bit_depth)
+    return paths
+
+def to_bit_depth(image: Image.Image, bit_depth: int) -> Image.Image:
+    """
+    Prepara un mapa en escala de grises para exportarlo con la profundidad indicada.
+
+    Con 16 bits, los valores 0-255 se escalan a 0-65535 (multiplicando por 257), de
+    modo que el blanco sigue siendo el valor máximo. Los mapas RGB no cambian.
+
+    Args:
+        image (PIL.Image.Image): El mapa a exportar.
+        bit_depth (int): 8 o 16 (ver GREYSCALE_BIT_DEPTHS).
+
+    Returns:
+        PIL.Image.Image: El mapa listo para guardar.
+    """
+    if bit_depth not in GREYSCALE_BIT_DEPTHS:
+        raise ValueError(f"Profundidad de bits inválida: {bit_depth}")
+    if bit_depth == 8 or image.mode != 'L':
+        return image
+    return Image.fromarray(np.asarray(image, dtype=np.uint16) * 257)  # Modo I;16
+
+def save_maps(maps: MutableMapping, output_dir: str, prefix: str = "", bit_depth: int = 8) -> List[str]:
+    """
+    Guarda cada mapa como PNG en un directorio.
+
+    Los mapas en escala de grises se guardan con un solo canal, de 8 o 16 bits.
+
+    Args:
+        maps (dict): Los mapas a guardar por nombre.
+        output_dir (str): El directorio de salida (se crea si no existe).
+        prefix (str): Prefijo para los nombres de archivo. Defaults to "".
+        bit_depth (int): Profundidad de los mapas en escala de grises (8 o 16). Defaults to 8.
+
+    Returns:
+        list: Las rutas de los archivos escritos.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, image in maps.items():
+        path = os.path.join(output_dir, f"{prefix}{name}.png")
+        to_bit_depth(image, bit_depth).save(path)
+        paths.append(path)
+    return paths
+
+def save_composite(maps: MutableMapping, output_dir: str, light_intensity: float = 1.0, prefix: str = "") -> str:
+    """
+    Crea la imagen compuesta de los mapas y la guarda como PNG.
+
+    Si los mapas están en un scratch.ScratchStore, la composición se hace por bandas
+    sobre los archivos mapeados en memoria (ver composite.create_composite_streaming).
+    El resultado se escribe en un archivo temporal del almacén, que se elimina apenas
+    se copia la imagen, para que 'composite' no quede como un mapa más del almacén.
+
+    Args:
+        maps (dict): Los mapas generados por nombre.
+        output_dir (str): El directorio de salida (se crea si no existe).
+        light_intensity (float): La intensidad de la luz (0.0-1.0). Defaults to 1.0.
+        prefix (str): Prefijo para el nombre de archivo. Defaults to "".
+
+    Returns:
+        str: La ruta del archivo escrito.
+    """
+    if isinstance(maps, scratch.ScratchStore):
+        arrays = {name: maps.array(name) for name in ('diffuse', 'normal', 'edge', 'ao')}
+        height, width = arrays['diffuse'].shape[:2]
+        try:
+            output = composite.create_composite_streaming(arrays, maps.allocate('composite', (height, width, 3)), light_intensity)
+            composite_image = Image.fromarray(np.asarray(output), 'RGB')
+            del output  # Cerrar el mapeo antes de borrar el archivo (necesario en Windows)
+        finally:
+            if 'composite' in maps:
+                del maps['composite']
+    else:
+        composite_image = composite.create_composite_image(maps['diffuse'], maps['height'], maps['normal'], maps['metallic'],
+                                                           maps['smoothness'], maps['edge'], maps['ao'],
+                                                           light_intensity=light_intensity)
+        if composite_image is None:
+            raise ValueError("No se pudo crear la imagen compuesta.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{prefix}composite.png")
+    composite_image.save(path)
+    return path
@@ -0,0 +1,200 @@
+# ----------------------------------------------------------------------------
+#  File:        project.py
+#  Module:      Project
+#  Description: Módulo para guardar y abrir proyectos con los mapas generados en caché.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+from collections.abc import MutableMapping
+from PIL import Image
+from typing import Dict, Optional, Tuple
+import pipeline
+
+# Versión del formato del archivo de proyecto
+PROJECT_FORMAT = 1
+
+# Extensión de los archivos de proyecto
+PROJECT_EXTENSION = ".ttgproj"
+
+# Lado máximo de las miniaturas guardadas en caché (similar al tamaño de las vistas previas)
+THUMBNAIL_SIZE = 1024
+
+def file_sha256(file_path: str) -> str:
+    """
+    Calcula el hash SHA-256 de un archivo, leyéndolo por bloques.
+
+    Args:
+        file_path (str): La ruta del archivo.
+
+    Returns:
+        str: El hash en hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_dir_for(project_path: str) -> str:
+    """
+    Devuelve el directorio de caché de un proyecto (junto al archivo de proyecto).
+
+    Args:
+        project_path (str): La ruta del archivo de proyecto.
+
+    Returns:
+        str: El directorio donde se guardan los mapas y las miniaturas.
+    """
+    return os.path.splitext(project_path)[0] + "_cache"
+
+def relative_to(path: str, directory: str) -> str:
+    """
+    Devuelve la ruta relativa a un directorio, o la absoluta si no hay ruta relativa (otra unidad en Windows).
+
+    Args:
+        path (str): La ruta a convertir.
+        directory (str): El directorio de referencia.
+
+    Returns:
+        str: La ruta relativa, o la absoluta.
+    """
+    try:
+        return os.path.relpath(path, directory)
+    except ValueError:
+        return os.path.abspath(path)
+
+def save_project(project_path: str, source_path: str, maps: MutableMapping, parameters: Dict[str, float],
+                 resolution: int, light_intensity: float = 1.0, source_hash: Optional[str] = None) -> Dict:
+    """
+    Guarda un proyecto: la imagen original y su hash, los parámetros, y los mapas y miniaturas en caché.
+
+    Las rutas se guardan relativas al archivo de proyecto, para poder mover el
+    proyecto junto con su caché y su imagen original.
+
+    Args:
+        project_path (str): La ruta del archivo de proyecto.
+        source_path (str): La ruta de la imagen diffuse original.
+        maps (dict): Los mapas generados por nombre (ver pipeline.generate_maps).
+        parameters (dict): Valores de los sliders (0-100) por nombre de mapa.
+        resolution (int): La resolución de los mapas en píxeles.
+        light_intensity (float): La intensidad de la luz de la composición (0.0-1.0). Defaults to 1.0.
+        source_hash (str, optional): El hash de la imagen original, si ya se conoce. Defaults to None.
+
+    Returns:
+        dict: El contenido del archivo de proyecto.
+    """
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    cache_dir = cache_dir_for(os.path.abspath(project_path))
+    thumbnail_dir = os.path.join(cache_dir, "thumbnails")
+    os.makedirs(thumbnail_dir, exist_ok=True)
+
+    map_paths = {}
+    thumbnail_paths = {}
+    for name in pipeline.MAP_NAMES:
+        if name not in maps:
+            continue
+        image = maps[name]
+        map_path = os.path.join(cache_dir, f"{name}.png")
+        image.save(map_path)
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BICUBIC)
+        thumbnail_path = os.path.join(thumbnail_dir, f"{name}.png")
+        thumbnail.save(thumbnail_path)
+
+        map_paths[name] = relative_to(map_path, project_dir)
+        thumbnail_paths[name] = relative_to(thumbnail_path, project_dir)
+
+    project = {
+        'format': PROJECT_FORMAT,
+        'generator_version': pipeline.GENERATOR_VERSION,
+        'source': relative_to(source_path, project_dir),
+        'source_sha256': source_hash or file_sha256(source_path),
+        'resolution': resolution,
+        'light_intensity': light_intensity,
+        'parameters': pipeline.resolve_parameters(parameters),
+        'maps': map_paths,
+        'thumbnails': thumbnail_paths,
+    }
+    with open(project_path, 'w', encoding='utf-8') as project_file:
+        json.dump(project, project_file, indent=2)
+    return project
+
+def load_project(project_path: str) -> Dict:
+    """
+    Lee un archivo de proyecto y convierte sus rutas en absolutas.
+
+    Args:
+        project_path (str): La ruta del archivo de proyecto.
+
+    Returns:
+        dict: El contenido del proyecto, con las rutas ya resueltas.
+    """
+    with open(project_path, encoding='utf-8') as project_file:
+        project = json.load(project_file)
+    if project.get('format') != PROJECT_FORMAT:
+        raise ValueError(f"Formato de proyecto no compatible: {project.get('format')}")
+
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    resolve = lambda path: os.path.normpath(os.path.join(project_dir, path))
+    project['source'] = resolve(project['source'])
+    project['maps'] = {name: resolve(path) for name, path in project['maps'].items()}
+    project['thumbnails'] = {name: resolve(path) for name, path in project['thumbnails'].items()}
+    # Los proyectos pueden haberse guardado con menos parámetros que los actuales
+    project['parameters'] = pipeline.resolve_parameters(
+        {name: value for name, value in project['parameters'].items() if name in pipeline.DEFAULT_PARAMETERS})
+    return project
+
+def cache_is_valid(project: Dict, source_hash: Optional[str] = None) -> bool:
+    """
+    Indica si los mapas en caché de un proyecto siguen correspondiendo a su imagen original.
+
+    La caché deja de valer si la imagen original cambió, si los generadores cambiaron
+    de versión o si falta alguno de los archivos.
+
+    Args:
+        project (dict): El proyecto devuelto por load_project.
+        source_hash (str, optional): El hash actual de la imagen original, si ya se conoce. Defaults to None.
+
+    Returns:
+        bool: True si los mapas en caché pueden usarse sin recalcularlos.
+    """
+    if project['generator_version'] != pipeline.GENERATOR_VERSION:
+        return False
+    if set(project['maps']) != set(pipeline.MAP_NAMES):
+        return False
+    paths = list(project['maps'].values()) + list(project['thumbnails'].values())
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    return (source_hash or file_sha256(project['source'])) == project['source_sha256']
+
+def open_cached_maps(project: Dict) -> Tuple[Dict[str, Image.Image], Dict[str, Image.Image]]:
+    """
+    Abre los mapas y las miniaturas en caché de un proyecto.
+
+    Las miniaturas y el mapa diffuse se cargan enseguida: las miniaturas para
+    mostrarlas y el diffuse porque es la entrada de los generadores, que lo leen
+    desde varios hilos. Los demás mapas se abren sin decodificar y Pillow los lee
+    recién cuando se usan (al guardarlos o al calcular la composición).
+
+    Args:
+        project (dict): El proyecto devuelto por load_project.
+
+    Returns:
+        tuple: Los mapas y las miniaturas, por nombre.
+    """
+    maps = {name: Image.open(path) for name, path in project['maps'].items()}
+    if 'diffuse' in maps:
+        maps['diffuse'].load()
+    thumbnails = {}
+    for name, path in project['thumbnails'].items():
+        with Image.open(path) as thumbnail:
+            thumbnails[name] = thumbnail.copy()
+    return maps, thumbnails
@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------------
+#  File:        pyramid.py
+#  Module:      Pyramid
+#  Description: Módulo con las operaciones de pirámide de reducción compartidas por los generadores.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import numpy as np
+
+# Cantidad de filas de resultado que se procesan por vez (par, para que cada franja empiece en una fila par)
+STRIP_ROWS = 32
+
+# Las funciones trabajan sobre los dos últimos ejes, así que aceptan tanto una
+# imagen (alto x ancho) como una pila de texturas del mismo tamaño (n x alto x ancho).
+
+def pad_edges(array: np.ndarray) -> np.ndarray:
+    """
+    Agrega un píxel de margen repitiendo el borde en los dos últimos ejes.
+
+    Args:
+        array (numpy.ndarray): La imagen o pila de imágenes.
+
+    Returns:
+        numpy.ndarray: El arreglo con margen.
+    """
+    return np.pad(array, [(0, 0)] * (array.ndim - 2) + [(1, 1), (1, 1)], mode='edge')
+
+def reduce(array: np.ndarray) -> np.ndarray:
+    """
+    Reduce a la mitad promediando bloques de 2x2, como Image.reduce(2).
+
+    Si un lado es impar, el último bloque promedia solo los píxeles que existen
+    (equivale a repetir el borde), y el resultado mide la mitad redondeando hacia arriba.
+
+    Args:
+        array (numpy.ndarray): La imagen o pila de imágenes.
+
+    Returns:
+        numpy.ndarray: El nivel reducido (float32).
+    """
+    height, width = array.shape[-2:]
+    if height % 2 or width % 2:
+        pad = [(0, 0)] * (array.ndim - 2) + [(0, height % 2), (0, width % 2)]
+        array = np.pad(array, pad, mode='edge')
+    rows = array[..., 0::2, :].astype(np.float32)
+    rows += array[..., 1::2, :]
+    reduced = rows[..., 0::2]
+    reduced += rows[..., 1::2]
+    reduced *= 0.25
+    return reduced
+
+def upsample_strip(padded: np.ndarray, top: int, bottom: int, width: int) -> np.ndarray:
+    """
+    Devuelve las filas [top, bottom) de un nivel ampliado al doble con interpolación bilineal.
+
+    Reproduce Image.resize con BILINEAR para una ampliación al doble, primero en
+    vertical (al ancho del nivel) y luego en horizontal. El nivel debe medir la
+    mitad del resultado, redondeando hacia arriba, como los que da reduce.
+
+    Args:
+        padded (numpy.ndarray): El nivel con un píxel de margen repetido (ver pad_edges).
+        top (int): La primera fila del resultado (par).
+        bottom (int): La fila siguiente a la última del resultado.
+        width (int): El ancho del resultado.
+
+    Returns:
+        numpy.ndarray: Las filas ampliadas (float32).
+    """
+    rows = padded[..., top // 2:(bottom - 1) // 2 + 3, :]
+    center = rows[..., 1:-1, :]
+    vertical = np.empty(padded.shape[:-2] + (bottom - top, padded.shape[-1]), dtype=np.float32)
+    even, odd = vertical[..., 0::2, :], vertical[..., 1::2, :]
+    count_even, count_odd = even.shape[-2], odd.shape[-2]
+    np.multiply(center[..., :count_even, :], 0.75, out=even)
+    even += 0.25 * rows[..., :count_even, :]
+    np.multiply(center[..., :count_odd, :], 0.75, out=odd)
+    odd += 0.25 * rows[..., 2:2 + count_odd, :]
+
+    center = vertical[..., 1:-1]
+    fine = np.empty(padded.shape[:-2] + (bottom - top, width), dtype=np.float32)
+    even, odd = fine[..., 0::2], fine[..., 1::2]
+    count_even, count_odd = even.shape[-1], odd.shape[-1]
+    np.multiply(center[..., :count_even], 0.75, out=even)
+    even += 0.25 * vertical[..., :count_even]
+    np.multiply(center[..., :count_odd], 0.75, out=odd)
+    odd += 0.25 * vertical[..., 2:2 + count_odd]
+    return fine
+
+def upsample(coarse: np.ndarray, shape: tuple) -> np.ndarray:
+    """
+    Amplía un nivel al doble (recortado a shape) con interpolación bilineal, por franjas.
+
+    Args:
+        coarse (numpy.ndarray): El nivel a ampliar.
+        shape (tuple): El tamaño (alto, ancho) del resultado.
+
+    Returns:
+        numpy.ndarray: El nivel ampliado (float32).
+    """
+    height, width = shape
+    padded = pad_edges(coarse)
+    fine = np.empty(coarse.shape[:-2] + (height, width), dtype=np.float32)
+    for top in range(0, height, STRIP_ROWS):
+        bottom = min(height, top + STRIP_ROWS)
+        fine[..., top:bottom, :] = upsample_strip(padded, top, bottom, width)
+    return fine
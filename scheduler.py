@@ -0,0 +1,304 @@
+# ----------------------------------------------------------------------------
+#  File:        scheduler.py
+#  Module:      Scheduler
+#  Description: Módulo para ejecutar trabajos por lotes respetando un presupuesto de memoria.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+import stages
+
+try:
+    import resource  # Solo existe en sistemas tipo Unix
+except ImportError:
+    resource = None
+
+# Bytes por píxel de cada mapa en memoria. Pillow guarda las imágenes RGB con
+# cuatro bytes por píxel y las de escala de grises con uno.
+MAP_BYTES_PER_PIXEL = {
+    'diffuse': 4,
+    'height': 1,
+    'normal': 4,
+    'metallic': 1,
+    'smoothness': 1,
+    'edge': 1,
+    'ao': 1,
+}
+
+# Bytes por píxel de los temporales de cada generador (arreglos de numpy)
+STAGE_TEMP_BYTES_PER_PIXEL = {
+    'normal': 8,  # Alturas, salida intermedia y la imagen uniforme del contraste
+    'edge': 24,   # Bordes, suavidad y producto en doble precisión
+    'ao': 6,      # Altura en precisión simple al armar la pirámide y niveles reducidos
+}
+
+# Bytes por píxel extra por cada nivel adicional de la pirámide de normales (gx, gy y niveles ampliados)
+NORMAL_LEVEL_BYTES_PER_PIXEL = 16
+
+# Bytes por píxel de los resultados intermedios (pasos con export=False de
+# pipeline.STAGES) que se conservan en memoria, también con scratch, hasta terminar
+# el trabajo, por el mapa que los usa. El campo de normales además se usa para
+# reducir el mapa normal a otras resoluciones.
+INTERMEDIATE_BYTES_PER_PIXEL = {
+    'height': 1,  # height_base
+    'normal': 4,  # normal_base
+    'edge': 1,    # edge_base
+    'ao': 1,      # occlusion
+}
+
+# Bytes por píxel de la composición (resultados de cada mezcla y el mapa en escala de
+# grises que se expande a RGB para mezclarlo)
+COMPOSITE_BYTES_PER_PIXEL = 16
+
+# Memoria fija de cada proceso de trabajo (intérprete, Pillow, numpy)
+PROCESS_OVERHEAD_BYTES = 80 * 1024 * 1024
+
+def estimate_job_memory(resolution: int, source_size: Optional[Sequence[int]] = None,
+                        map_names: Optional[Sequence[str]] = None, composite: bool = False,
+                        normal_levels: int = 1, scratch: bool = False, tier_resolutions: Sequence[int] = (),
+                        stage_workers: Optional[int] = None) -> int:
+    """
+    Estima el pico de memoria de un trabajo a partir de su resolución y de los mapas pedidos.
+
+    El modelo suma la imagen original decodificada, los mapas que quedan en memoria
+    y los temporales de los generadores que pueden ejecutarse a la vez: como los
+    generadores independientes corren en paralelo (ver stages.StageRegistry.run),
+    se suman los stage_workers temporales más grandes. Con scratch, los mapas
+    mapeados en memoria siguen contando en la memoria residente, así que se cuentan
+    igual; solo la composición, que se hace por bandas, no suma memoria. Las
+    estimaciones son aproximadas; load_calibration corrige el error sistemático
+    con los picos medidos en ejecuciones anteriores.
+
+    Args:
+        resolution (int): La resolución de trabajo (la más alta si hay varias).
+        source_size (tuple, optional): El tamaño de la imagen original. Si es None, se
+            supone igual a la resolución. Defaults to None.
+        map_names (list, optional): Los mapas generados. Si es None, todos. Defaults to None.
+        composite (bool): Si también se crea la imagen compuesta. Defaults to False.
+        normal_levels (int): Los niveles de la pirámide de normales. Defaults to 1.
+        scratch (bool): Si los mapas intermedios se guardan en disco. Defaults to False.
+        tier_resolutions (list): Las demás resoluciones que se guardan, cuyos mapas quedan
+            en memoria junto a los de la resolución principal. Defaults to ().
+        stage_workers (int, optional): Los hilos con que se ejecutan los generadores. Si es
+            None, stages.DEFAULT_WORKERS. Defaults to None.
+
+    Returns:
+        int: La memoria estimada en bytes.
+    """
+    if map_names is None:
+        map_names = list(MAP_BYTES_PER_PIXEL)
+    pixels = resolution * resolution
+    source_pixels = source_size[0] * source_size[1] if source_size else pixels
+
+    map_bytes = [MAP_BYTES_PER_PIXEL.get(name, 4) for name in map_names]
+    resident = sum(map_bytes)
+    resident += sum(INTERMEDIATE_BYTES_PER_PIXEL.get(name, 0) for name in map_names)
+
+    temporaries = [STAGE_TEMP_BYTES_PER_PIXEL.get(name, 0) for name in map_names if name != 'normal']
+    if 'normal' in map_names:
+        temporaries.append(STAGE_TEMP_BYTES_PER_PIXEL['normal'] + NORMAL_LEVEL_BYTES_PER_PIXEL * (normal_levels - 1))
+    concurrent = sorted(temporaries, reverse=True)[:stage_workers or stages.DEFAULT_WORKERS]
+    peak_per_pixel = resident + sum(concurrent)
+    if composite and not scratch:
+        peak_per_pixel = max(peak_per_pixel, resident + COMPOSITE_BYTES_PER_PIXEL)
+
+    tier_pixels = sum(tier * tier for tier in tier_resolutions if tier != resolution)
+    return PROCESS_OVERHEAD_BYTES + source_pixels * 4 + pixels * peak_per_pixel + tier_pixels * resident
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Devuelve el pico de memoria residente del proceso actual.
+
+    Returns:
+        int or None: El pico en bytes, o None si el sistema no permite medirlo.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa kilobytes, macOS bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory_info = psutil.Process().memory_info()
+    return getattr(memory_info, 'peak_wset', memory_info.rss)
+
+def measured_call(function: Callable, arguments: Sequence, keyword_arguments: Dict) -> Dict:
+    """
+    Ejecuta una función en el proceso de trabajo y mide su duración y su pico de memoria.
+
+    Como cada trabajo corre en un proceso nuevo, el pico del proceso es el del trabajo.
+
+    Args:
+        function (callable): La función a ejecutar (debe poder enviarse a otro proceso).
+        arguments (list): Los argumentos posicionales.
+        keyword_arguments (dict): Los argumentos por nombre.
+
+    Returns:
+        dict: El resultado ('result'), la duración ('seconds') y el pico medido ('peak_rss').
+    """
+    start = time.perf_counter()
+    result = function(*arguments, **keyword_arguments)
+    return {'result': result, 'seconds': time.perf_counter() - start, 'peak_rss': peak_rss_bytes()}
+
+class Job:
+    """
+    Un trabajo a ejecutar por el planificador, con su estimación de memoria.
+    """
+    def __init__(self, name: str, estimate: int, arguments: Sequence = (), keyword_arguments: Optional[Dict] = None):
+        """
+        Inicializa el trabajo.
+
+        Args:
+            name (str): Un nombre para los informes (por ejemplo la ruta de la imagen).
+            estimate (int): La memoria estimada en bytes, sin calibrar.
+            arguments (list): Los argumentos posicionales de la función. Defaults to ().
+            keyword_arguments (dict, optional): Los argumentos por nombre. Defaults to None.
+        """
+        self.name = name
+        self.estimate = estimate
+        self.arguments = tuple(arguments)
+        self.keyword_arguments = keyword_arguments or {}
+
+class MemoryBudgetScheduler:
+    """
+    Ejecuta trabajos en procesos paralelos sin superar un presupuesto de memoria.
+
+    Cada vez que se libera lugar, admite primero el trabajo pendiente más grande que
+    entra en la memoria libre y completa el resto con trabajos más chicos, de modo que
+    los trabajos pequeños se intercalan alrededor de los grandes en lugar de esperar
+    detrás de ellos. Un trabajo que no entra ni con el presupuesto completo se ejecuta
+    solo. Cada trabajo corre en un proceso nuevo para poder medir su pico de memoria.
+    """
+    def __init__(self, budget_bytes: int, max_workers: Optional[int] = None, calibration: float = 1.0):
+        """
+        Inicializa el planificador.
+
+        Args:
+            budget_bytes (int): La memoria total disponible para los trabajos.
+            max_workers (int, optional): La cantidad máxima de procesos. Si es None, la cantidad de núcleos. Defaults to None.
+            calibration (float): Factor que multiplica las estimaciones (ver load_calibration). Defaults to 1.0.
+        """
+        self.budget_bytes = budget_bytes
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.calibration = calibration
+
+    def admitted_estimate(self, job: Job) -> int:
+        """Devuelve la estimación calibrada de un trabajo."""
+        return int(job.estimate * self.calibration)
+
+    def next_job(self, pending: List[Job], in_use: int, running: int) -> Optional[Job]:
+        """
+        Elige el próximo trabajo a admitir, o None si ninguno entra ahora.
+
+        Args:
+            pending (list): Los trabajos pendientes, ordenados de mayor a menor estimación.
+            in_use (int): La memoria estimada de los trabajos en ejecución.
+            running (int): La cantidad de trabajos en ejecución.
+
+        Returns:
+            Job or None: El trabajo elegido.
+        """
+        if running >= self.max_workers:
+            return None
+        for job in pending:
+            if in_use + self.admitted_estimate(job) <= self.budget_bytes:
+                return job
+        # Un trabajo más grande que el presupuesto solo se ejecuta cuando no hay otros
+        if running == 0 and pending:
+            return pending[0]
+        return None
+
+    def run(self, jobs: Sequence[Job], function: Callable, on_complete: Optional[Callable] = None) -> List[Dict]:
+        """
+        Ejecuta todos los trabajos y devuelve un registro por trabajo.
+
+        Args:
+            jobs (list): Los trabajos a ejecutar.
+            function (callable): La función que ejecuta cada trabajo (nivel de módulo, para poder enviarla a otro proceso).
+            on_complete (callable, optional): Se llama con cada registro al terminar un trabajo. Defaults to None.
+
+        Returns:
+            list: Los registros con 'name', 'estimate', 'peak_rss', 'seconds', 'result' y 'error'.
+        """
+        pending = sorted(jobs, key=lambda job: job.estimate, reverse=True)
+        running = {}
+        in_use = 0
+        records = []
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, max_tasks_per_child=1) as executor:
+            while pending or running:
+                job = self.next_job(pending, in_use, len(running))
+                while job is not None:
+                    pending.remove(job)
+                    future = executor.submit(measured_call, function, job.arguments, job.keyword_arguments)
+                    running[future] = job
+                    in_use += self.admitted_estimate(job)
+                    job = self.next_job(pending, in_use, len(running))
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    in_use -= self.admitted_estimate(job)
+                    record = {'name': job.name, 'estimate': job.estimate, 'peak_rss': None, 'seconds': None,
+                              'result': None, 'error': None}
+                    try:
+                        record.update(future.result())
+                    except Exception as e:
+                        record['error'] = str(e)
+                    records.append(record)
+                    if on_complete:
+                        on_complete(record)
+        return records
+
+def append_calibration_log(records: Sequence[Dict], log_path: str):
+    """
+    Agrega al registro de calibración la estimación y el pico medido de cada trabajo.
+
+    Args:
+        records (list): Los registros devueltos por MemoryBudgetScheduler.run.
+        log_path (str): La ruta del archivo (una línea JSON por trabajo).
+    """
+    with open(log_path, 'a', encoding='utf-8') as log_file:
+        for record in records:
+            if record['peak_rss'] and not record['error']:
+                log_file.write(json.dumps({'name': record['name'], 'estimate': record['estimate'],
+                                           'peak_rss': record['peak_rss'], 'seconds': record['seconds']}) + "\n")
+
+def load_calibration(log_path: str, percentile: float = 0.95, recent: int = 200) -> float:
+    """
+    Calcula el factor de calibración a partir de los picos medidos en ejecuciones anteriores.
+
+    El factor es un percentil alto del cociente entre el pico medido y la estimación
+    de los trabajos más recientes, para que las estimaciones calibradas rara vez
+    queden por debajo del uso real.
+
+    Args:
+        log_path (str): La ruta del registro de calibración.
+        percentile (float): El percentil a usar (0-1). Defaults to 0.95.
+        recent (int): La cantidad de trabajos recientes que se consideran. Defaults to 200.
+
+    Returns:
+        float: El factor de calibración (1.0 si no hay registros).
+    """
+    if not os.path.exists(log_path):
+        return 1.0
+    ratios = []
+    with open(log_path, encoding='utf-8') as log_file:
+        for line in log_file:
+            if line.strip():
+                entry = json.loads(line)
+                ratios.append(entry['peak_rss'] / entry['estimate'])
+    ratios = sorted(ratios[-recent:])
+    if not ratios:
+        return 1.0
+    return ratios[min(len(ratios) - 1, int(percentile * len(ratios)))]
@@ -0,0 +1,156 @@
+# ----------------------------------------------------------------------------
+#  File:        scratch.py
+#  Module:      Scratch
+#  Description: Módulo para guardar los mapas intermedios en archivos mapeados en memoria.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from collections.abc import MutableMapping
+import numpy as np
+from PIL import Image
+from typing import Iterator, Optional, Tuple
+
+# Cantidad de filas que se copian por vez al escribir un mapa en disco
+BAND_ROWS = 512
+
+class ScratchStore(MutableMapping):
+    """
+    Almacén de mapas respaldado por archivos .npy mapeados en memoria.
+
+    Se usa como un diccionario de mapas: al asignar una imagen se escribe en un
+    archivo .npy del directorio temporal y la imagen en RAM puede liberarse; al
+    leerla se devuelve una imagen que lee directamente del archivo. Las páginas de
+    los archivos mapeados cuentan en la memoria residente del proceso mientras el
+    sistema no las descarte, así que el almacén no baja el pico medido: a 4096 px
+    es de unos 600 MB con o sin él. Su ventaja es que, si falta memoria, el sistema
+    puede devolver esas páginas al archivo en lugar de usar swap, y que la
+    composición se hace por bandas (ver pipeline.save_composite).
+
+    Los mapas en escala de grises (modo L) se devuelven como vistas sin copia.
+    Los mapas RGB se guardan con tres canales y se copian a RAM solo al leerlos
+    como imagen; para recorrerlos sin copiarlos se usa array().
+    """
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Inicializa el almacén en un subdirectorio temporal propio.
+
+        Args:
+            directory (str, optional): El directorio donde crear el subdirectorio temporal.
+                Si es None, usa el directorio temporal del sistema. Defaults to None.
+        """
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="ttg_scratch_", dir=directory)
+        self.names = []  # Nombres guardados, en orden de inserción
+
+    def path_for(self, name: str) -> str:
+        """
+        Devuelve la ruta del archivo .npy de un mapa.
+
+        Args:
+            name (str): El nombre del mapa.
+
+        Returns:
+            str: La ruta del archivo.
+        """
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def allocate(self, name: str, shape: Tuple[int, ...]) -> np.memmap:
+        """
+        Crea un arreglo uint8 mapeado en memoria para que otro módulo lo escriba.
+
+        Args:
+            name (str): El nombre del mapa.
+            shape (tuple): (alto, ancho) para escala de grises o (alto, ancho, 3) para RGB.
+
+        Returns:
+            numpy.memmap: El arreglo escribible.
+        """
+        array = np.lib.format.open_memmap(self.path_for(name), mode='w+', dtype=np.uint8, shape=shape)
+        if name not in self.names:
+            self.names.append(name)
+        return array
+
+    def array(self, name: str) -> np.memmap:
+        """
+        Devuelve el contenido de un mapa como arreglo de solo lectura mapeado en memoria.
+
+        Args:
+            name (str): El nombre del mapa.
+
+        Returns:
+            numpy.memmap: El arreglo (alto x ancho, o alto x ancho x 3).
+        """
+        if name not in self.names:
+            raise KeyError(name)
+        return np.load(self.path_for(name), mmap_mode='r')
+
+    def __setitem__(self, name: str, image: Image.Image):
+        """
+        Escribe un mapa en su archivo .npy, por bandas de filas.
+
+        Args:
+            name (str): El nombre del mapa.
+            image (PIL.Image.Image): El mapa a guardar. Los modos distintos de L se guardan como RGB.
+        """
+        if image.mode != 'L' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        width, height = image.size
+        shape = (height, width) if image.mode == 'L' else (height, width, 3)
+
+        array = self.allocate(name, shape)
+        for top in range(0, height, BAND_ROWS):
+            bottom = min(height, top + BAND_ROWS)
+            array[top:bottom] = np.asarray(image.crop((0, top, width, bottom)))
+        array.flush()
+        del array
+
+    def __getitem__(self, name: str) -> Image.Image:
+        """
+        Devuelve un mapa como imagen de Pillow.
+
+        Args:
+            name (str): El nombre del mapa.
+
+        Returns:
+            PIL.Image.Image: El mapa (vista de solo lectura sin copia para modo L).
+        """
+        array = self.array(name)
+        height, width = array.shape[:2]
+        if array.ndim == 2:
+            return Image.frombuffer('L', (width, height), array, 'raw', 'L', 0, 1)
+        return Image.fromarray(np.asarray(array), 'RGB')
+
+    def __delitem__(self, name: str):
+        """
+        Elimina un mapa y su archivo.
+
+        Args:
+            name (str): El nombre del mapa.
+        """
+        self.names.remove(name)
+        os.remove(self.path_for(name))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.names))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def cleanup(self):
+        """Elimina el directorio temporal y todos sus archivos."""
+        self.names = []
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
@@ -13,7 +13,7 @@ from PIL import Image, ImageEnhance
 
 def generate_smoothness_map(diffuse_image: Image.Image, smoothness_intensity: float) -> Image.Image:
     """
-    Genera un mapa de suavidad donde todo es blanco (puede ajustarse) en formato RGB.
+    Genera un mapa de suavidad donde todo es blanco (puede ajustarse) en escala de grises (modo L).
 
     Este mapa se utiliza para indicar la suavidad de la superficie,
     influyendo en cómo se reflejan las luces. Por defecto, genera una imagen
@@ -28,7 +28,7 @@ def generate_smoothness_map(diffuse_image: Image.Image, smoothness_intensity: fl
     """
     width, height = diffuse_image.size
     # Crear una imagen completamente blanca
-    smoothness_map = Image.new('RGB', (width, height), color=(255, 255, 255))
+    smoothness_map = Image.new('L', (width, height), color=255)
 
     # Ajustar intensidad usando brillo
     enhancer = ImageEnhance.Brightness(smoothness_map)
@@ -0,0 +1,170 @@
+# ----------------------------------------------------------------------------
+#  File:        stages.py
+#  Module:      Stages
+#  Description: Módulo para registrar los generadores de mapas y ejecutarlos en paralelo.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import os
+from collections.abc import MutableMapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+# Nombre de la entrada que representa la imagen diffuse recibida (no un mapa generado)
+SOURCE = 'source'
+
+# Cantidad de hilos por defecto. Pillow y numpy liberan el GIL en sus operaciones
+# pesadas, así que los pasos independientes se superponen; más hilos que mapas
+# independientes no aportan nada.
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+class Stage:
+    """
+    Un paso del proceso: genera un mapa a partir de otros mapas y de parámetros.
+
+    La función recibe primero las entradas (en el orden de inputs) y luego los
+    valores de los parámetros (en el orden de parameters), ya escalados. Los pasos
+    con export=False generan resultados intermedios que usan otros pasos pero que
+    no se muestran ni se guardan como mapas.
+    """
+    def __init__(self, name: str, function: Callable, inputs: Sequence[str] = (SOURCE,), parameters: Sequence[str] = (),
+                 export: bool = True):
+        """
+        Inicializa el paso.
+
+        Args:
+            name (str): El nombre del mapa que genera.
+            function (callable): La función generadora.
+            inputs (list): Los mapas de entrada, o SOURCE para la imagen diffuse recibida. Defaults to (SOURCE,).
+            parameters (list): Los nombres de los parámetros que recibe. Defaults to ().
+            export (bool): Si el resultado es un mapa (True) o un resultado intermedio (False). Defaults to True.
+        """
+        self.name = name
+        self.export = export
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.parameters = tuple(parameters)
+
+    def run(self, inputs: Sequence, values: Dict):
+        """
+        Ejecuta el generador.
+
+        Args:
+            inputs (list): Las imágenes de entrada, en el orden de self.inputs.
+            values (dict): Los valores escalados de los parámetros por nombre.
+
+        Returns:
+            PIL.Image.Image: El mapa generado.
+        """
+        return self.function(*inputs, *(values[name] for name in self.parameters))
+
+class StageRegistry:
+    """
+    Registro ordenado de los pasos que generan cada mapa.
+
+    El orden de registro es el orden en que se muestran y guardan los mapas.
+    Cada paso solo puede depender de pasos registrados antes que él, lo que
+    garantiza que no haya ciclos.
+    """
+    def __init__(self):
+        """Inicializa el registro vacío."""
+        self.stages = {}
+        self.names = []  # Mapas exportados. Lista compartida: se actualiza al registrar nuevos pasos
+
+    def register(self, stage: Stage):
+        """
+        Registra un paso.
+
+        Args:
+            stage (Stage): El paso a registrar.
+        """
+        if stage.name in self.stages or stage.name == SOURCE:
+            raise ValueError(f"Ya existe un mapa llamado {stage.name}.")
+        for name in stage.inputs:
+            if name != SOURCE and name not in self.stages:
+                raise ValueError(f"El mapa {stage.name} depende de {name}, que no está registrado.")
+        self.stages[stage.name] = stage
+        if stage.export:
+            self.names.append(stage.name)
+
+    def __getitem__(self, name: str) -> Stage:
+        return self.stages[name]
+
+    def __iter__(self) -> Iterator[Stage]:
+        return iter(list(self.stages.values()))
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def run(self, source, values: Dict, maps: Optional[MutableMapping] = None,
+            max_workers: Optional[int] = None, intermediates: Optional[Dict] = None) -> MutableMapping:
+        """
+        Genera todos los mapas, ejecutando en paralelo los pasos cuyas entradas ya están listas.
+
+        Cada paso se lanza apenas terminan los pasos de los que depende, así que el
+        tiempo total se acerca al del camino más largo de dependencias en lugar de
+        la suma de todos los pasos. Los resultados se asignan a maps en el orden de
+        registro, desde este hilo, de modo que el orden de los mapas no depende de
+        cuál termine primero. Las entradas se decodifican en este hilo antes de
+        enviarlas, porque una imagen abierta con Image.open se decodifica al usarla
+        por primera vez y varios hilos no pueden decodificarla a la vez.
+
+        Args:
+            source (PIL.Image.Image): La imagen diffuse de entrada.
+            values (dict): Los valores escalados de los parámetros por nombre.
+            maps (dict, optional): Dónde guardar los mapas (por ejemplo un scratch.ScratchStore).
+                Si es None, un diccionario nuevo. Defaults to None.
+            max_workers (int, optional): La cantidad de hilos; con 1 los pasos se ejecutan
+                uno tras otro. Si es None, DEFAULT_WORKERS. Defaults to None.
+            intermediates (dict, optional): Si se indica, recibe los resultados de los pasos
+                con export=False. Defaults to None.
+
+        Returns:
+            dict: Los mapas generados por nombre (el propio maps si se indicó).
+        """
+        if maps is None:
+            maps = {}
+        if intermediates is None:
+            intermediates = {}
+        finished = {}  # Mapas que todavía no se asignaron a maps
+        pending = list(self.stages.values())
+        committed = 0
+        source.load()
+
+        def input_image(name):
+            if name == SOURCE:
+                return source
+            if name in intermediates:
+                image = intermediates[name]
+            else:
+                image = finished[name] if name in finished else maps[name]
+            image.load()
+            return image
+
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WORKERS) as executor:
+            running = {}
+            while pending or running:
+                done_names = set(self.names[:committed]) | set(finished) | set(intermediates)
+                for stage in [stage for stage in pending if all(name == SOURCE or name in done_names for name in stage.inputs)]:
+                    pending.remove(stage)
+                    inputs = [input_image(name) for name in stage.inputs]
+                    running[executor.submit(stage.run, inputs, values)] = stage.name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if self.stages[name].export:
+                        finished[name] = future.result()
+                    else:
+                        intermediates[name] = future.result()
+
+                # Asignar en orden de registro los mapas ya terminados
+                while committed < len(self.names) and self.names[committed] in finished:
+                    name = self.names[committed]
+                    maps[name] = finished.pop(name)
+                    committed += 1
+        return maps
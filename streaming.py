@@ -0,0 +1,201 @@
+# ----------------------------------------------------------------------------
+#  File:        streaming.py
+#  Module:      Streaming
+#  Description: Módulo para superponer la lectura, el cálculo y la escritura en los lotes.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Marca de fin de trabajo que cada etapa envía a la siguiente
+_DONE = object()
+
+class StageStats:
+    """
+    Tiempo ocupado de una etapa, para informar su utilización al final del lote.
+    """
+    def __init__(self, name: str, workers: int):
+        """
+        Inicializa las estadísticas.
+
+        Args:
+            name (str): El nombre de la etapa.
+            workers (int): La cantidad de hilos de la etapa.
+        """
+        self.name = name
+        self.workers = workers
+        self.busy_seconds = 0.0
+        self.items = 0
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float):
+        """Suma el tiempo ocupado en procesar un elemento."""
+        with self.lock:
+            self.busy_seconds += seconds
+            self.items += 1
+
+    def utilisation(self, wall_seconds: float) -> float:
+        """
+        Devuelve la fracción del tiempo total en que los hilos de la etapa estuvieron ocupados.
+
+        Args:
+            wall_seconds (float): La duración total del lote.
+
+        Returns:
+            float: La utilización (0-1).
+        """
+        if wall_seconds <= 0:
+            return 0.0
+        return self.busy_seconds / (wall_seconds * self.workers)
+
+class StreamingPipeline:
+    """
+    Procesa elementos en tres etapas que se superponen: lectura, cálculo y escritura.
+
+    Los lectores cargan por adelantado los próximos elementos en una cola acotada,
+    de modo que el cálculo no espera al disco; los resultados pasan a otra cola
+    acotada que vacían los escritores en segundo plano. Cada etapa tiene su propia
+    cantidad de hilos. Las colas acotadas limitan cuántos elementos cargados o
+    calculados esperan en memoria a la vez.
+
+    Las funciones de cada etapa reciben el elemento original y el resultado de la
+    etapa anterior. Un error en cualquier etapa se registra para ese elemento y
+    no detiene el resto del lote.
+    """
+    def __init__(self, load: Callable, compute: Callable, write: Callable, readers: int = 2,
+                 computers: int = 1, writers: int = 2, prefetch: int = 2):
+        """
+        Inicializa el proceso.
+
+        Args:
+            load (callable): load(item) devuelve los datos cargados.
+            compute (callable): compute(item, loaded) devuelve el resultado a escribir.
+            write (callable): write(item, computed) escribe el resultado y devuelve lo que se informa.
+            readers (int): La cantidad de hilos de lectura. Defaults to 2.
+            computers (int): La cantidad de hilos de cálculo. Defaults to 1.
+            writers (int): La cantidad de hilos de escritura. Defaults to 2.
+            prefetch (int): Cuántos elementos cargados (y cuántos calculados) pueden esperar en cola. Defaults to 2.
+        """
+        if min(readers, computers, writers, prefetch) < 1:
+            raise ValueError("Cada etapa necesita al menos un hilo y la cola al menos un lugar.")
+        self.load = load
+        self.compute = compute
+        self.write = write
+        self.prefetch = prefetch
+        self.stats = [StageStats("Lectura", readers), StageStats("Cálculo", computers), StageStats("Escritura", writers)]
+        self.wall_seconds = 0.0
+
+    def run(self, items: Sequence, on_complete: Optional[Callable] = None) -> List[Dict]:
+        """
+        Procesa todos los elementos.
+
+        Args:
+            items (list): Los elementos a procesar (por ejemplo rutas de imágenes).
+            on_complete (callable, optional): Se llama con cada registro al terminar un elemento. Defaults to None.
+
+        Returns:
+            list: Un registro por elemento con 'item', 'result' y 'error', en el orden en que terminaron.
+        """
+        read_stats, compute_stats, write_stats = self.stats
+        loaded_queue = queue.Queue(self.prefetch)
+        computed_queue = queue.Queue(self.prefetch)
+        remaining = iter(items)
+        remaining_lock = threading.Lock()
+        records = []
+        records_lock = threading.Lock()
+
+        def finish(item, result, error):
+            record = {'item': item, 'result': result, 'error': error}
+            with records_lock:
+                records.append(record)
+            if on_complete:
+                on_complete(record)
+
+        def timed(stats, function, *arguments):
+            start = time.perf_counter()
+            try:
+                return function(*arguments), None
+            except Exception as e:
+                return None, e
+            finally:
+                stats.add(time.perf_counter() - start)
+
+        def reader():
+            while True:
+                with remaining_lock:
+                    item = next(remaining, _DONE)
+                if item is _DONE:
+                    return
+                loaded_queue.put((item, *timed(read_stats, self.load, item)))
+
+        def computer():
+            while True:
+                entry = loaded_queue.get()
+                if entry is _DONE:
+                    return
+                item, loaded, error = entry
+                if error is None:
+                    computed, error = timed(compute_stats, self.compute, item, loaded)
+                    del loaded  # Liberar la imagen cargada antes de esperar lugar en la cola
+                    entry = (item, computed, error)
+                computed_queue.put(entry)
+
+        def writer():
+            while True:
+                entry = computed_queue.get()
+                if entry is _DONE:
+                    return
+                item, computed, error = entry
+                if error is None:
+                    result, error = timed(write_stats, self.write, item, computed)
+                    finish(item, result, None if error is None else str(error))
+                else:
+                    finish(item, None, str(error))
+
+        def start_threads(target, count):
+            threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            return threads
+
+        start = time.perf_counter()
+        reader_threads = start_threads(reader, read_stats.workers)
+        computer_threads = start_threads(computer, compute_stats.workers)
+        writer_threads = start_threads(writer, write_stats.workers)
+
+        # Cada etapa avisa a la siguiente cuando terminaron todos sus hilos
+        for thread in reader_threads:
+            thread.join()
+        for _ in computer_threads:
+            loaded_queue.put(_DONE)
+        for thread in computer_threads:
+            thread.join()
+        for _ in writer_threads:
+            computed_queue.put(_DONE)
+        for thread in writer_threads:
+            thread.join()
+
+        self.wall_seconds = time.perf_counter() - start
+        return records
+
+    def report(self) -> str:
+        """
+        Devuelve un resumen de la utilización de cada etapa en la última ejecución.
+
+        Una etapa con utilización cercana al 100% es la que limita el lote.
+
+        Returns:
+            str: Una línea por etapa.
+        """
+        lines = [f"Tiempo total: {self.wall_seconds:.2f} s"]
+        for stats in self.stats:
+            lines.append(f"{stats.name}: {stats.workers} hilo(s), {stats.items} elemento(s), "
+                         f"{stats.busy_seconds:.2f} s ocupados, utilización {stats.utilisation(self.wall_seconds):.0%}")
+        return "\n".join(lines)
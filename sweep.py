@@ -0,0 +1,247 @@
+# ----------------------------------------------------------------------------
+#  File:        sweep.py
+#  Module:      Sweep
+#  Description: Módulo para generar barridos de parámetros con hoja de contactos.
+#
+#  Author:      Mauricio José Tobares
+#  Created:     19/10/2026
+#  Copyright:   (c) 2026 Mauricio José Tobares
+#  License:     MIT License
+# ----------------------------------------------------------------------------
+
+import argparse
+import itertools
+import os
+import shutil
+from PIL import Image, ImageDraw
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import pipeline
+from stages import SOURCE
+
+class SweepEvaluator:
+    """
+    Evalúa los pasos de pipeline.STAGES para muchas combinaciones de parámetros.
+
+    Cada paso se guarda en caché según los parámetros de los que depende, incluidos
+    los de sus entradas, de modo que un resultado intermedio se calcula una sola vez
+    por valor distinto. Por ejemplo, el campo de normales ('normal_base') solo se
+    recalcula cuando cambia la altura, y para cada intensidad normal solo se aplica
+    el ajuste de contraste.
+    """
+    def __init__(self, diffuse_image: Image.Image):
+        """
+        Inicializa el evaluador.
+
+        Args:
+            diffuse_image (PIL.Image.Image): La imagen diffuse ya redimensionada.
+        """
+        self.source = diffuse_image
+        self.cache = {}
+        self.evaluations = 0  # Cantidad de pasos realmente calculados
+
+    def cached(self, key: Tuple, compute: Callable[[], Image.Image]) -> Image.Image:
+        """
+        Devuelve el resultado de un paso, calculándolo solo la primera vez.
+
+        Args:
+            key (tuple): Identifica el paso y los parámetros de los que depende.
+            compute (callable): Función que calcula el paso.
+
+        Returns:
+            PIL.Image.Image: El resultado del paso.
+        """
+        if key not in self.cache:
+            self.cache[key] = compute()
+            self.evaluations += 1
+        return self.cache[key]
+
+    def stage_parameters(self, name: str) -> List[str]:
+        """Devuelve los parámetros de los que depende un paso, incluidos los de sus entradas."""
+        stage = pipeline.STAGES[name]
+        names = list(stage.parameters)
+        for input_name in stage.inputs:
+            if input_name != SOURCE:
+                names += [parameter for parameter in self.stage_parameters(input_name) if parameter not in names]
+        return names
+
+    def stage_result(self, name: str, values: Dict[str, float], results: Dict[str, Image.Image]) -> Image.Image:
+        """Devuelve el resultado de un paso, calculado una vez por valor de sus parámetros."""
+        stage = pipeline.STAGES[name]
+        key = (name,) + tuple(values[parameter] for parameter in self.stage_parameters(name))
+        inputs = [self.source if input_name == SOURCE else results[input_name] for input_name in stage.inputs]
+        return self.cached(key, lambda: stage.run(inputs, pipeline.scale_parameters(values)))
+
+    def evaluate(self, parameters: Dict[str, float]) -> Dict[str, Image.Image]:
+        """
+        Devuelve todos los mapas para una combinación de parámetros.
+
+        Args:
+            parameters (dict): Valores de los sliders (0-100) por nombre de mapa.
+
+        Returns:
+            dict: Los mapas generados por nombre, en el orden de pipeline.MAP_NAMES.
+        """
+        values = pipeline.resolve_parameters(parameters)
+        # Los pasos están registrados después de sus entradas, así que basta recorrerlos en orden
+        results = {}
+        for stage in pipeline.STAGES:
+            results[stage.name] = self.stage_result(stage.name, values, results)
+        return {name: results[name] for name in pipeline.MAP_NAMES}
+
+def expand_grid(grid: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """
+    Expande una grilla de parámetros en todas sus combinaciones.
+
+    Args:
+        grid (dict): Lista de valores (0-100) por nombre de parámetro. Los parámetros
+            que no aparecen usan su valor por defecto.
+
+    Returns:
+        list: Una combinación completa de parámetros por variante.
+    """
+    names = [name for name in pipeline.DEFAULT_PARAMETERS if name in grid]
+    pipeline.resolve_parameters({name: 0 for name in grid})  # Valida los nombres
+    variants = []
+    for combination in itertools.product(*(grid[name] for name in names)):
+        variants.append(pipeline.resolve_parameters(dict(zip(names, combination))))
+    return variants
+
+def format_value(value) -> str:
+    """
+    Da formato a un valor de parámetro para etiquetas y nombres de archivo.
+
+    Args:
+        value (float or str): El valor.
+
+    Returns:
+        str: El valor sin decimales innecesarios.
+    """
+    return f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+def variant_label(parameters: Dict[str, float], swept_names: Sequence[str]) -> str:
+    """
+    Construye un nombre corto para una variante a partir de los parámetros barridos.
+
+    Args:
+        parameters (dict): Los parámetros de la variante.
+        swept_names (list): Los nombres de los parámetros que varían.
+
+    Returns:
+        str: El nombre de la variante (por ejemplo "height50_normal30").
+    """
+    if not swept_names:
+        return "default"
+    return "_".join(f"{name}{format_value(parameters[name])}" for name in swept_names)
+
+def run_sweep(diffuse_image: Image.Image, grid: Dict[str, Sequence[float]]) -> Tuple[List[Tuple[Dict[str, float], Dict[str, Image.Image]]], SweepEvaluator]:
+    """
+    Evalúa todas las combinaciones de una grilla de parámetros compartiendo las etapas comunes.
+
+    Args:
+        diffuse_image (PIL.Image.Image): La imagen diffuse ya redimensionada.
+        grid (dict): Lista de valores (0-100) por nombre de parámetro.
+
+    Returns:
+        tuple: La lista de (parámetros, mapas) por variante y el evaluador utilizado.
+    """
+    evaluator = SweepEvaluator(diffuse_image)
+    results = [(parameters, evaluator.evaluate(parameters)) for parameters in expand_grid(grid)]
+    return results, evaluator
+
+def create_contact_sheet(results: List[Tuple[Dict[str, float], Dict[str, Image.Image]]], swept_names: Sequence[str],
+                         thumbnail_size: int = 128, map_names: Optional[Sequence[str]] = None) -> Image.Image:
+    """
+    Crea una hoja de contactos con una fila por variante y una columna por mapa.
+
+    Args:
+        results (list): La lista de (parámetros, mapas) devuelta por run_sweep.
+        swept_names (list): Los nombres de los parámetros que varían (se usan como etiqueta).
+        thumbnail_size (int): El tamaño de cada miniatura en píxeles. Defaults to 128.
+        map_names (list, optional): Los mapas a incluir. Si es None, se incluyen todos. Defaults to None.
+
+    Returns:
+        PIL.Image.Image: La hoja de contactos.
+    """
+    if map_names is None:
+        map_names = pipeline.MAP_NAMES
+    label_width = 160
+    header_height = 20
+    padding = 4
+    cell = thumbnail_size + padding
+
+    sheet = Image.new('RGB', (label_width + cell * len(map_names), header_height + cell * len(results)), color=(32, 32, 32))
+    draw = ImageDraw.Draw(sheet)
+    for col, name in enumerate(map_names):
+        draw.text((label_width + col * cell, 4), name.capitalize(), fill=(255, 255, 255))
+
+    # Las miniaturas se cachean por imagen, ya que muchas variantes comparten mapas
+    thumbnails = {}
+    for row, (parameters, maps) in enumerate(results):
+        top = header_height + row * cell
+        for line, name in enumerate(swept_names):
+            draw.text((4, top + line * 14), f"{name}: {format_value(parameters[name])}", fill=(255, 255, 255))
+        for col, name in enumerate(map_names):
+            image = maps[name]
+            if id(image) not in thumbnails:
+                thumbnails[id(image)] = image.convert('RGB').resize((thumbnail_size, thumbnail_size), Image.Resampling.BILINEAR)
+            sheet.paste(thumbnails[id(image)], (label_width + col * cell, top))
+    return sheet
+
+def save_sweep(results: List[Tuple[Dict[str, float], Dict[str, Image.Image]]], swept_names: Sequence[str], output_dir: str) -> int:
+    """
+    Guarda los mapas de cada variante en un subdirectorio propio.
+
+    Los mapas compartidos entre variantes se codifican una sola vez y luego se copian.
+
+    Args:
+        results (list): La lista de (parámetros, mapas) devuelta por run_sweep.
+        swept_names (list): Los nombres de los parámetros que varían.
+        output_dir (str): El directorio de salida.
+
+    Returns:
+        int: La cantidad de imágenes codificadas.
+    """
+    written = {}  # id de la imagen -> primera ruta escrita
+    for parameters, maps in results:
+        variant_dir = os.path.join(output_dir, variant_label(parameters, swept_names))
+        os.makedirs(variant_dir, exist_ok=True)
+        for name, image in maps.items():
+            path = os.path.join(variant_dir, f"{name}.png")
+            if id(image) in written:
+                shutil.copyfile(written[id(image)], path)
+            else:
+                image.save(path)
+                written[id(image)] = path
+    return len(written)
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Punto de entrada de la línea de comandos para el barrido de parámetros.
+
+    Args:
+        argv (list, optional): Los argumentos de la línea de comandos. Defaults to None.
+    """
+    parser = argparse.ArgumentParser(description="Genera variantes de los mapas para una grilla de parámetros.")
+    parser.add_argument("diffuse", help="Ruta de la imagen diffuse.")
+    parser.add_argument("-o", "--output", required=True, help="Directorio de salida.")
+    parser.add_argument("-r", "--resolution", type=int, default=1024, help="Resolución objetivo en píxeles (por defecto 1024).")
+    parser.add_argument("--thumbnail", type=int, default=128, help="Tamaño de las miniaturas de la hoja de contactos (por defecto 128).")
+    for name in pipeline.DEFAULT_PARAMETERS:
+        value_type = {'choices': pipeline.PARAMETER_CHOICES[name]} if name in pipeline.PARAMETER_CHOICES else {'type': float}
+        parser.add_argument(f"--{name}", nargs="+", metavar="VALOR", **value_type,
+                            help=f"Valores del parámetro {name} a barrer.")
+    args = parser.parse_args(argv)
+
+    grid = {name: getattr(args, name) for name in pipeline.DEFAULT_PARAMETERS if getattr(args, name)}
+    swept_names = [name for name in pipeline.DEFAULT_PARAMETERS if name in grid]
+
+    diffuse_image = pipeline.load_diffuse_image(args.diffuse, args.resolution)
+    results, evaluator = run_sweep(diffuse_image, grid)
+
+    encoded = save_sweep(results, swept_names, args.output)
+    sheet = create_contact_sheet(results, swept_names, args.thumbnail)
+    sheet.save(os.path.join(args.output, "contact_sheet.png"))
+    print(f"{len(results)} variantes, {evaluator.evaluations} etapas calculadas, {encoded} imágenes codificadas.")
+
+if __name__ == "__main__":
+    main()